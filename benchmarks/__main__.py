@@ -0,0 +1,89 @@
+"""Micro-benchmarks for repository queries, achievements and text rendering.
+
+    python -m benchmarks run --sizes 10k,100k --output baseline.json
+    python -m benchmarks run --output current.json
+    python -m benchmarks compare baseline.json current.json --threshold 0.1
+
+`compare` exits non-zero when any median regressed beyond the threshold.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+# bot.config requires these at import; nothing here talks to either service.
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:benchmark")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from benchmarks import cases  # noqa: E402
+from benchmarks.harness import compare  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run benchmarks and write JSON results")
+    run.add_argument(
+        "--sizes",
+        default=",".join(cases.SIZES),
+        help=f"assigned_tasks sizes to seed (default: {','.join(cases.SIZES)})",
+    )
+    run.add_argument("-k", "--filter", default="", help="only names containing this")
+    run.add_argument("-o", "--output", help="write results here instead of stdout")
+
+    cmp = commands.add_parser("compare", help="flag regressions against a baseline")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument(
+        "--threshold", type=float, default=0.1, help="allowed slowdown (0.1 = 10%%)"
+    )
+    return parser.parse_args()
+
+
+def run(args: argparse.Namespace) -> None:
+    sizes = [s for s in args.sizes.split(",") if s]
+    unknown = set(sizes) - cases.SIZES.keys()
+    if unknown:
+        sys.exit(f"Unknown sizes: {', '.join(sorted(unknown))}")
+    results = asyncio.run(cases.run(sizes, lambda name: args.filter in name))
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("bot").setLevel(logging.WARNING)
+    if args.command == "run":
+        run(args)
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    lines, regressed = compare(baseline, current, args.threshold)
+    print("\n".join(lines))
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable
+
+import aiosqlite
+
+from benchmarks.harness import Bench, measure
+from bot.achievements.definitions import check_achievements
+from bot.achievements.engine import AchievementEngine
+from bot.db.models import REBUILD_USER_STATS, init_db
+from bot.db.repository import Repository
+from bot.handlers.achievements import _build_achievements_text, _progress_bar
+from bot.handlers.progress import _build_progress_text
+from bot.services.catalog import ProblemCatalog
+from bot.services.recommender import Recommender
+
+logger = logging.getLogger(__name__)
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+RULE_SETS = (1_000, 10_000)
+TASKS_PER_USER = 50
+CATALOG_SIZE = 3000
+
+CATEGORIES = (
+    "Array", "String", "Hash Table", "Dynamic Programming", "Math", "Sorting",
+    "Greedy", "Tree", "Graph", "Binary Search", "Linked List", "Stack",
+)
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+
+# Every user gets TASKS_PER_USER tasks over the catalog's categories and
+# difficulties; 70% of them are completed.
+_SEED_USERS = """
+WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < :users)
+INSERT INTO users (id, telegram_id, leetcode_username)
+SELECT i, 1000000 + i, 'user' || i FROM seq
+"""
+_SEED_TASKS = """
+WITH RECURSIVE seq(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM seq WHERE i < :rows - 1)
+INSERT INTO assigned_tasks (user_id, leetcode_slug, difficulty, category, completed_at)
+SELECT
+    i % :users + 1,
+    'problem-' || (i % 3000),
+    json_extract(:difficulties, '$[' || (i % 3) || ']'),
+    json_extract(:categories, '$[' || (i % 12) || ']'),
+    CASE WHEN i % 10 < 7 THEN '2025-01-01 00:00:00' END
+FROM seq
+"""
+
+
+async def seed(db: aiosqlite.Connection, rows: int) -> int:
+    """Fill a fresh database with `rows` assigned tasks; returns the user count."""
+    users = max(rows // TASKS_PER_USER, 1)
+    await db.execute(_SEED_USERS, {"users": users})
+    await db.execute(
+        _SEED_TASKS,
+        {
+            "rows": rows,
+            "users": users,
+            "difficulties": json.dumps(DIFFICULTIES),
+            "categories": json.dumps(CATEGORIES),
+        },
+    )
+    await db.execute(REBUILD_USER_STATS, {"user_id": None})
+    await db.commit()
+    await db.execute("ANALYZE")
+    return users
+
+
+def synthetic_problems(count: int) -> list[dict[str, Any]]:
+    """Catalog entries matching the seeded tasks' slugs, one or two tags each."""
+    return [
+        {
+            "titleSlug": f"problem-{i}",
+            "title": f"Problem {i}",
+            "difficulty": DIFFICULTIES[i % 3],
+            "topicTags": [
+                {"name": CATEGORIES[i % 12]},
+                *([{"name": CATEGORIES[(i + 1 + i // 12 % 11) % 12]}] if i % 2 else []),
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+def synthetic_rules(count: int) -> list[dict[str, Any]]:
+    """`count` achievement rules spread over every dimension and threshold."""
+    rules: list[dict[str, Any]] = []
+    dimensions: list[tuple[str | None, str]] = [
+        *(("category", c) for c in CATEGORIES),
+        *(("difficulty", d) for d in DIFFICULTIES),
+        (None, ""),
+    ]
+    for i in range(count):
+        dimension, key = dimensions[i % len(dimensions)]
+        rule: dict[str, Any] = {
+            "key": f"rule_{i}",
+            "name": f"Rule {i}",
+            "description": "Synthetic rule",
+            "required": i // len(dimensions) + 1,
+        }
+        if dimension is not None:
+            rule[dimension] = key
+        rules.append(rule)
+    return rules
+
+
+async def _drain(iterator: AsyncIterator[Any]) -> None:
+    async for _ in iterator:
+        pass
+
+
+async def run(
+    sizes: list[str], selected: Callable[[str], bool]
+) -> dict[str, dict[str, float]]:
+    results: dict[str, dict[str, float]] = {}
+
+    async def bench(name: str, fn: Bench) -> None:
+        if not selected(name):
+            return
+        results[name] = await measure(fn)
+        logger.info("%-48s %10.1f µs", name, results[name]["median_us"])
+
+    await bench("render._progress_bar", lambda: _progress_bar(7, 10))
+
+    for label in sizes:
+        rows = SIZES[label]
+        with tempfile.TemporaryDirectory() as tmp:
+            db = await init_db(str(Path(tmp) / "bench.db"))
+            try:
+                started = time.perf_counter()
+                users = await seed(db, rows)
+                logger.info(
+                    "Seeded %s tasks for %d users in %.1fs",
+                    label, users, time.perf_counter() - started,
+                )
+                await _run_db_cases(bench, Repository(db), label, users)
+            finally:
+                await db.close()
+    return results
+
+
+async def _run_db_cases(
+    bench: Callable[[str, Bench], Any], repo: Repository, label: str, users: int
+) -> None:
+    user_id = users // 2 + 1
+    telegram_id = 1_000_000 + user_id
+    task = {"titleSlug": "problem-1", "difficulty": "Medium", "category": "Array"}
+
+    await bench(f"repo.get_user[{label}]", lambda: repo.get_user(telegram_id))
+    await bench(f"repo.get_stats[{label}]", lambda: repo.get_stats(user_id))
+    await bench(
+        f"repo.get_pending_tasks[{label}]", lambda: repo.get_pending_tasks(user_id)
+    )
+    await bench(
+        f"repo.get_completed_tasks[{label}]",
+        lambda: repo.get_completed_tasks(user_id),
+    )
+    await bench(
+        f"repo.get_user_achievements[{label}]",
+        lambda: repo.get_user_achievements(user_id),
+    )
+    await bench(
+        f"repo.iter_tracked_users[{label}]", lambda: _drain(repo.iter_tracked_users())
+    )
+    await bench(f"repo.rebuild_stats[{label}]", lambda: repo.rebuild_stats(user_id))
+
+    await bench(
+        f"achievements.check_achievements[{label}]",
+        lambda: check_achievements(repo, user_id, task),
+    )
+    for count in RULE_SETS:
+        engine = AchievementEngine(synthetic_rules(count))
+        await bench(
+            f"achievements.check[{count} rules,{label}]",
+            lambda: engine.check(repo, user_id, task),
+        )
+        await bench(
+            f"achievements.check_all[{count} rules,{label}]",
+            lambda: engine.check(repo, user_id),
+        )
+
+    await bench(
+        f"render._build_progress_text[{label}]",
+        lambda: _build_progress_text(repo, telegram_id),
+    )
+    await bench(
+        f"render._build_achievements_text[{label}]",
+        lambda: _build_achievements_text(repo, telegram_id),
+    )
+
+    await repo.upsert_problems(synthetic_problems(CATALOG_SIZE))
+    catalog = ProblemCatalog(repo, None)
+    await catalog.load()
+    recommender = Recommender(catalog, seed=0)
+    solved = [{"difficulty": d, "count": 40} for d in DIFFICULTIES]
+    skills = {
+        "fundamental": [
+            {"tagName": c, "problemsSolved": i} for i, c in enumerate(CATEGORIES)
+        ]
+    }
+    assigned = {t["leetcode_slug"] for t in await repo.get_completed_tasks(user_id)}
+    await bench(
+        f"recommender.suggest[{CATALOG_SIZE} problems,{label}]",
+        lambda: recommender.suggest(solved, skills, assigned),
+    )
+
+    # Last: every call adds a pending task for the probe user.
+    await bench(
+        f"repo.assign_tasks[{label}]", lambda: repo.assign_tasks(user_id, [task])
+    )
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import inspect
+import statistics
+import time
+from typing import Any, Awaitable, Callable
+
+Bench = Callable[[], Any] | Callable[[], Awaitable[Any]]
+
+
+async def measure(
+    fn: Bench, repeat: int = 7, sample_seconds: float = 0.05
+) -> dict[str, float]:
+    """Time `fn` (sync or async) and return per-call statistics in µs.
+
+    The call count per sample is calibrated so each sample runs for at least
+    `sample_seconds`; the median of `repeat` samples is the headline number.
+    """
+    probe = fn()
+    is_async = inspect.isawaitable(probe)
+    if is_async:
+        await probe
+
+    async def sample(number: int) -> float:
+        started = time.perf_counter()
+        if is_async:
+            for _ in range(number):
+                await fn()
+        else:
+            for _ in range(number):
+                fn()
+        return time.perf_counter() - started
+
+    number = 1
+    while (elapsed := await sample(number)) < sample_seconds:
+        number = max(number * 2, int(number * sample_seconds / max(elapsed, 1e-9)))
+    per_call = [await sample(number) / number * 1e6 for _ in range(repeat)]
+    return {
+        "median_us": statistics.median(per_call),
+        "min_us": min(per_call),
+        "stdev_us": statistics.stdev(per_call) if repeat > 1 else 0.0,
+        "calls_per_sample": number,
+    }
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], threshold: float
+) -> tuple[list[str], bool]:
+    """Report lines comparing median times, and whether anything regressed.
+
+    A benchmark regresses when its median grows by more than `threshold`
+    (0.1 = 10%) over the baseline.
+    """
+    base, cur = baseline["results"], current["results"]
+    lines = [f"{'benchmark':<48}{'baseline':>12}{'current':>12}{'change':>9}"]
+    regressed = False
+    for name in sorted(base.keys() | cur.keys()):
+        if name not in cur:
+            lines.append(f"{name:<48}{'':>12}{'missing':>12}")
+            continue
+        if name not in base:
+            lines.append(f"{name:<48}{'new':>12}{cur[name]['median_us']:>12.1f}")
+            continue
+        before, after = base[name]["median_us"], cur[name]["median_us"]
+        change = after / before - 1 if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag, regressed = "  REGRESSION", True
+        lines.append(
+            f"{name:<48}{before:>12.1f}{after:>12.1f}{change:>+9.1%}{flag}"
+        )
+    return lines, regressed
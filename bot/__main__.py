@@ -1,15 +1,23 @@
 import asyncio
 import logging
 
-from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram import Bot
 
+from bot import metrics
 from bot.config import settings
-from bot.db.models import init_db
+from bot.db.models import connect_reader, init_db
+from bot.db.pool import ReadPool
 from bot.db.repository import Repository
-from bot.handlers import start, tasks, progress, achievements
+from bot.dispatcher import create_dispatcher
+from bot.services.catalog import ProblemCatalog
 from bot.services.gpt import GPTService
+from bot.services.leases import LeaseManager
 from bot.services.leetcode import LeetCodeClient
+from bot.services.notifier import Notifier
+from bot.services.ratelimit import TokenBucket
+from bot.services.recommender import Recommender
+from bot.services.scheduler import PollScheduler
+from bot.services.suggestions import SuggestionService
 from bot.services.tracker import run_tracker
 
 logging.basicConfig(
@@ -20,35 +28,85 @@ logger = logging.getLogger(__name__)
 
 
 async def main() -> None:
+    metrics_runner = None
+    if settings.metrics_port:
+        metrics_runner = await metrics.start_server(
+            settings.metrics_host, settings.metrics_port
+        )
     db = await init_db(settings.database_path)
-    repo = Repository(db)
-    leetcode = LeetCodeClient()
-    gpt = GPTService()
+    readers = None
+    if settings.db_read_pool_size > 0:
+        readers = await ReadPool.open(
+            settings.db_read_pool_size, lambda: connect_reader(settings.database_path)
+        )
+    repo = Repository(
+        db,
+        group_commit_window=settings.db_group_commit_ms / 1000,
+        readers=readers,
+    )
+    leetcode = LeetCodeClient(
+        rate_limiter=TokenBucket(settings.leetcode_requests_per_second)
+    )
+    catalog = ProblemCatalog(repo, leetcode)
+    await catalog.load()
+    recommender = Recommender(catalog)
+    gpt = GPTService() if settings.suggest_mode != "local" else None
+    suggestions = SuggestionService(repo, leetcode, catalog, gpt, recommender)
 
-    bot = Bot(token=settings.telegram_bot_token)
-    dp = Dispatcher(storage=MemoryStorage())
-
-    # Register routers
-    dp.include_router(start.router)
-    dp.include_router(tasks.router)
-    dp.include_router(progress.router)
-    dp.include_router(achievements.router)
+    # Handlers push newly assigned users straight to an embedded tracker;
+    # standalone trackers find them on their next resync.
+    scheduler = None
+    if settings.tracker_embedded:
+        scheduler = PollScheduler(settings.tracker_partitions)
 
-    # Inject dependencies via dispatcher workflow data
-    dp["repo"] = repo
-    dp["leetcode"] = leetcode
-    dp["gpt"] = gpt
+    bot = Bot(token=settings.telegram_bot_token)
+    dp = create_dispatcher(
+        repo=repo,
+        leetcode=leetcode,
+        suggestions=suggestions,
+        scheduler=scheduler,
+    )
+    notifier = Notifier(
+        bot,
+        messages_per_second=settings.telegram_messages_per_second,
+        chat_interval=settings.telegram_chat_interval_seconds,
+        coalesce_window=settings.notify_coalesce_seconds,
+    )
 
-    # Start background tracker
-    tracker_task = asyncio.create_task(run_tracker(bot, repo, leetcode))
+    # Start outbound delivery, background tracker, catalog refresh and
+    # suggestion prefetch.
+    # With tracker_embedded off, run `python -m bot.tracker` processes instead.
+    notifier.start()
+    tracker_task = None
+    if scheduler is not None:
+        leases = LeaseManager(
+            repo, settings.tracker_partitions, settings.tracker_lease_seconds
+        )
+        tracker_task = asyncio.create_task(
+            run_tracker(notifier, repo, leetcode, leases, scheduler, suggestions)
+        )
+    catalog_task = asyncio.create_task(catalog.run_refresh())
+    prefetch_task = asyncio.create_task(suggestions.run())
 
     logger.info("Bot starting...")
     try:
         await dp.start_polling(bot)
     finally:
-        tracker_task.cancel()
+        if tracker_task is not None:
+            tracker_task.cancel()
+            # Let it release its leases before the database closes.
+            await asyncio.gather(tracker_task, return_exceptions=True)
+        catalog_task.cancel()
+        prefetch_task.cancel()
+        await asyncio.gather(prefetch_task, return_exceptions=True)
+        await notifier.close(settings.notify_flush_timeout_seconds)
         await leetcode.close()
+        await repo.flush()
+        if readers is not None:
+            await readers.close()
         await db.close()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
         logger.info("Bot stopped.")
 
 
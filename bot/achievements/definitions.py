@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Any
 
+from bot.achievements.engine import AchievementEngine
 from bot.db.repository import Repository
 
 ACHIEVEMENTS: list[dict[str, Any]] = [
@@ -42,21 +43,22 @@ ACHIEVEMENTS: list[dict[str, Any]] = [
 ]
 
 
-async def check_achievements(repo: Repository, user_id: int) -> list[dict[str, Any]]:
-    """Check and unlock any new achievements. Returns list of newly unlocked."""
-    by_category = await repo.get_completed_count_by_category(user_id)
-    by_difficulty = await repo.get_completed_count_by_difficulty(user_id)
-    total = await repo.get_total_completed(user_id)
+_engine = AchievementEngine(ACHIEVEMENTS)
 
-    newly_unlocked: list[dict[str, Any]] = []
 
-    for ach in ACHIEVEMENTS:
-        progress = _get_progress(ach, by_category, by_difficulty, total)
-        if progress >= ach["required"]:
-            if await repo.unlock_achievement(user_id, ach["key"]):
-                newly_unlocked.append(ach)
+async def check_achievements(
+    repo: Repository, user_id: int, task: dict[str, Any] | None = None
+) -> list[dict[str, Any]]:
+    """Check and unlock any new achievements. Returns list of newly unlocked.
 
-    return newly_unlocked
+    Pass the just-completed `task` to evaluate only the rules it can affect.
+    """
+    return await _engine.check(repo, user_id, task)
+
+
+def forget_unlocked(user_id: int) -> None:
+    """Call when a transaction that ran `check_achievements` fails to commit."""
+    _engine.forget(user_id)
 
 
 def get_achievement_progress(
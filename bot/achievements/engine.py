@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Any
+
+from bot.db.repository import Repository, UserStats
+
+TOTAL = ("total", "")
+
+
+def rule_dimension(ach: dict[str, Any]) -> tuple[str, str]:
+    if "category" in ach:
+        return "category", ach["category"]
+    if "difficulty" in ach:
+        return "difficulty", ach["difficulty"]
+    return TOTAL
+
+
+class AchievementEngine:
+    """Achievement rules compiled into an index by (dimension, key).
+
+    Rules for each dimension are sorted by threshold, so finding the ones a
+    count satisfies is a bisect. A completed task only touches its category,
+    its difficulty and the total, however many rules exist overall.
+    """
+
+    def __init__(
+        self, achievements: list[dict[str, Any]], cache_size: int = 10_000
+    ) -> None:
+        self._rules: dict[tuple[str, str], list[dict[str, Any]]] = {}
+        for ach in achievements:
+            self._rules.setdefault(rule_dimension(ach), []).append(ach)
+        for rules in self._rules.values():
+            rules.sort(key=lambda a: a["required"])
+        self._thresholds = {
+            dim: [a["required"] for a in rules] for dim, rules in self._rules.items()
+        }
+        self._cache_size = cache_size
+        self._unlocked: OrderedDict[int, set[str]] = OrderedDict()
+
+    def eligible(
+        self, stats: UserStats, dimensions: list[tuple[str, str]] | None = None
+    ) -> list[dict[str, Any]]:
+        """Rules whose threshold is met, limited to `dimensions` if given."""
+        eligible: list[dict[str, Any]] = []
+        for dim in self._rules if dimensions is None else dimensions:
+            rules = self._rules.get(dim)
+            if rules:
+                met = bisect_right(self._thresholds[dim], _count(stats, dim))
+                eligible.extend(rules[:met])
+        return eligible
+
+    async def check(
+        self,
+        repo: Repository,
+        user_id: int,
+        task: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Unlock newly earned achievements and return them.
+
+        With a completed `task`, only rules for its category, its difficulty
+        and the total are evaluated; otherwise every rule is.
+        """
+        dimensions = None
+        if task is not None:
+            dimensions = [
+                ("category", task["category"]),
+                ("difficulty", task["difficulty"]),
+                TOTAL,
+            ]
+        stats = await repo.get_stats(user_id)
+        unlocked = await self._unlocked_keys(repo, user_id)
+        candidates = [
+            ach for ach in self.eligible(stats, dimensions) if ach["key"] not in unlocked
+        ]
+        if not candidates:
+            return []
+        inserted = await repo.unlock_achievements(
+            user_id, [a["key"] for a in candidates]
+        )
+        unlocked.update(a["key"] for a in candidates)
+        return [ach for ach in candidates if ach["key"] in inserted]
+
+    def forget(self, user_id: int) -> None:
+        """Drop the user's cached unlocks, e.g. after their unit rolled back.
+
+        They are reloaded from the database on the next check.
+        """
+        self._unlocked.pop(user_id, None)
+
+    async def _unlocked_keys(self, repo: Repository, user_id: int) -> set[str]:
+        keys = self._unlocked.get(user_id)
+        if keys is not None:
+            self._unlocked.move_to_end(user_id)
+            return keys
+        keys = {a["achievement_key"] for a in await repo.get_user_achievements(user_id)}
+        self._unlocked[user_id] = keys
+        if len(self._unlocked) > self._cache_size:
+            self._unlocked.popitem(last=False)
+        return keys
+
+
+def _count(stats: UserStats, dim: tuple[str, str]) -> int:
+    dimension, key = dim
+    if dimension == "category":
+        return stats.by_category.get(key, 0)
+    if dimension == "difficulty":
+        return stats.by_difficulty.get(key, 0)
+    return stats.total
@@ -1,17 +1,89 @@
 from pathlib import Path
+from typing import Literal
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     telegram_bot_token: str
-    openai_api_key: str
+    # Only needed when suggest_mode is "gpt" or "hybrid".
+    openai_api_key: str = ""
+    openai_base_url: str | None = None
     database_path: str = "data/bot.db"
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
+    sqlite_busy_timeout_ms: int = 5000
+    db_group_commit_ms: int = 0
+    db_read_pool_size: int = 4
     leetcode_graphql_url: str = "https://leetcode.com/graphql/"
     tracker_interval_seconds: int = 300
+    tracker_max_interval_seconds: int = 6 * 3600
+    tracker_concurrency: int = 8
+    tracker_batch_size: int = 20
+    tracker_batch_window_seconds: float = 5.0
+    tracker_resync_seconds: float = 30.0
+    tracker_embedded: bool = True
+    tracker_partitions: int = 64
+    tracker_lease_seconds: int = 60
+    leetcode_requests_per_second: float = 2.0
+    leetcode_timeout_seconds: float = 10.0
+    leetcode_deadline_seconds: float = 30.0
+    leetcode_max_attempts: int = 4
+    leetcode_backoff_base_seconds: float = 0.5
+    leetcode_backoff_max_seconds: float = 10.0
+    leetcode_breaker_threshold: int = 5
+    leetcode_breaker_reset_seconds: float = 30.0
+    leetcode_concurrency: int = 4
+    leetcode_max_concurrency: int = 16
+    leetcode_cache_size: int = 10_000
+    leetcode_profile_ttl_seconds: float = 300.0
+    leetcode_negative_ttl_seconds: float = 60.0
+    catalog_ttl_seconds: int = 86400
+    catalog_page_size: int = 100
+    suggest_cooldown_seconds: float = 30.0
+    # gpt: GPT picks problems; local: NumPy recommender only, no OpenAI call;
+    # hybrid: recommender picks, GPT only writes the analysis text.
+    suggest_mode: Literal["gpt", "local", "hybrid"] = "gpt"
+    # Stream GPT suggestions and show them as they arrive, at most one
+    # message edit per telegram_edit_interval_seconds.
+    gpt_streaming: bool = True
+    # Estimated prompt size cap for suggestions, system prompt included.
+    gpt_prompt_token_budget: int = 800
+    # Ranked candidates asked of GPT per batch; the first 3 valid ones are kept.
+    gpt_candidate_count: int = 8
+    telegram_edit_interval_seconds: float = 1.0
+    # Next batch per user, computed ahead of /tasks and served while fresh.
+    suggest_prefetch: bool = True
+    suggest_queue_ttl_seconds: float = 6 * 3600
+    suggest_prefetch_concurrency: int = 2
+    suggest_prefetch_interval_seconds: float = 60.0
+    suggest_prefetch_batch_size: int = 20
+    # Per-bot notification budget. Each tracker sends at its share of it
+    # (partitions held / tracker_partitions), so all trackers together stay
+    # within the limit.
+    telegram_messages_per_second: float = 25.0
+    telegram_chat_interval_seconds: float = 1.0
+    notify_coalesce_seconds: float = 2.0
+    # How long shutdown waits for queued notifications to go out.
+    notify_flush_timeout_seconds: float = 10.0
+
+    # Metrics (Prometheus text on http://host:port/metrics; 0 disables)
+    metrics_host: str = "0.0.0.0"
+    metrics_port: int = 0
 
     model_config = {"env_file": ".env"}
 
+    @model_validator(mode="after")
+    def _require_openai_key(self) -> "Settings":
+        if not self.openai_api_key and self.suggest_mode != "local":
+            raise ValueError(
+                f"OPENAI_API_KEY is required with SUGGEST_MODE={self.suggest_mode}"
+            )
+        return self
+
 
 settings = Settings()
 
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+
+import aiosqlite
+
+
+class GroupCommitter:
+    """Coalesce commits from concurrent writers into one per time window.
+
+    Writers run their statements under the shared write lock, release it and
+    then await `commit()`. The first waiter schedules a flush `window` seconds
+    out; everyone who arrives before it shares that single commit.
+    """
+
+    def __init__(
+        self, db: aiosqlite.Connection, lock: asyncio.Lock, window: float
+    ) -> None:
+        self.db = db
+        self.window = window
+        self._lock = lock
+        self._pending: asyncio.Future[None] | None = None
+        self._flusher: asyncio.Task[None] | None = None
+
+    @property
+    def pending(self) -> bool:
+        """Whether a commit is scheduled and will end the open transaction."""
+        return self._pending is not None
+
+    async def commit(self) -> None:
+        if self._pending is None:
+            self._pending = asyncio.get_running_loop().create_future()
+            self._flusher = asyncio.create_task(self._flush_later())
+        await asyncio.shield(self._pending)
+
+    async def flush(self) -> None:
+        """Commit whatever is pending right away."""
+        if self._pending is not None and self._flusher is not None:
+            # Still sleeping: its waiters are picked up by this flush instead.
+            self._flusher.cancel()
+        await self._flush()
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        # A failed commit is reported to the waiters, not to the event loop.
+        with contextlib.suppress(Exception):
+            await self._flush()
+
+    async def _flush(self) -> None:
+        waiters, self._pending, self._flusher = self._pending, None, None
+        try:
+            async with self._lock:
+                await self.db.commit()
+        except Exception as exc:
+            if waiters is not None:
+                waiters.set_exception(exc)
+            raise
+        except BaseException:
+            if waiters is not None:
+                waiters.cancel()
+            raise
+        if waiters is not None:
+            waiters.set_result(None)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class Migration:
+    """One schema step: a SQL script or a coroutine taking the connection.
+
+    Each step runs in its own `BEGIN IMMEDIATE` transaction together with its
+    `schema_version` row, so concurrent processes migrating the same file
+    apply it exactly once. Steps must not commit on their own.
+    """
+
+    version: int
+    description: str
+    apply: str | Callable[[aiosqlite.Connection], Awaitable[None]]
+
+
+async def current_version(db: aiosqlite.Connection) -> int:
+    await db.execute(VERSION_TABLE)
+    cur = await db.execute("SELECT MAX(version) AS version FROM schema_version")
+    row = await cur.fetchone()
+    return row[0] or 0
+
+
+async def migrate(db: aiosqlite.Connection, migrations: list[Migration]) -> int:
+    """Apply pending migrations in version order; returns the new version.
+
+    The version is re-read under the write lock before every step, so a step
+    another process applied in the meantime is skipped rather than repeated.
+    """
+    version = 0
+    for step in sorted(migrations, key=lambda m: m.version):
+        await db.execute("BEGIN IMMEDIATE")
+        try:
+            version = await current_version(db)
+            if step.version > version:
+                logger.info(
+                    "Applying migration %d: %s", step.version, step.description
+                )
+                if isinstance(step.apply, str):
+                    for statement in _statements(step.apply):
+                        await db.execute(statement)
+                else:
+                    await step.apply(db)
+                await db.execute(
+                    "INSERT OR IGNORE INTO schema_version (version, description) "
+                    "VALUES (?, ?)",
+                    (step.version, step.description),
+                )
+                version = step.version
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+    return version
+
+
+def _statements(script: str) -> list[str]:
+    """Split a SQL script into statements (unlike `executescript`, no commits)."""
+    statements: list[str] = []
+    pending = ""
+    for line in script.splitlines(keepends=True):
+        pending += line
+        if sqlite3.complete_statement(pending):
+            statements.append(pending.strip())
+            pending = ""
+    if pending.strip():
+        statements.append(pending.strip())
+    return statements
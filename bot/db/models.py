@@ -1,5 +1,10 @@
+from pathlib import Path
+
 import aiosqlite
 
+from bot.config import settings
+from bot.db.migrations import Migration, migrate
+
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -25,12 +30,138 @@ CREATE TABLE IF NOT EXISTS achievements (
     unlocked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(user_id, achievement_key)
 );
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    dimension TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (user_id, dimension, key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS tracker_state (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id),
+    watermark INTEGER,
+    poll_interval INTEGER NOT NULL,
+    next_poll_at INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS problems (
+    slug TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    topic_tags TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Rebuilds `user_stats` from task history for one user, or all when NULL.
+REBUILD_USER_STATS = """
+INSERT INTO user_stats (user_id, dimension, key, count)
+SELECT user_id, 'category', category, COUNT(*) FROM assigned_tasks
+WHERE completed_at IS NOT NULL AND (:user_id IS NULL OR user_id = :user_id)
+GROUP BY user_id, category
+UNION ALL
+SELECT user_id, 'difficulty', difficulty, COUNT(*) FROM assigned_tasks
+WHERE completed_at IS NOT NULL AND (:user_id IS NULL OR user_id = :user_id)
+GROUP BY user_id, difficulty
+UNION ALL
+SELECT user_id, 'total', '', COUNT(*) FROM assigned_tasks
+WHERE completed_at IS NOT NULL AND (:user_id IS NULL OR user_id = :user_id)
+GROUP BY user_id
+"""
+
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_assigned_tasks_pending
+    ON assigned_tasks(user_id) WHERE completed_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_assigned_tasks_completed
+    ON assigned_tasks(user_id) WHERE completed_at IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_tracker_state_next_poll
+    ON tracker_state(next_poll_at);
+CREATE INDEX IF NOT EXISTS idx_problems_updated_at
+    ON problems(updated_at);
+"""
+
+
+TRACKER_LEASES = """
+CREATE TABLE IF NOT EXISTS tracker_leases (
+    partition INTEGER PRIMARY KEY,
+    owner TEXT,
+    expires_at REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_tracker_leases_owner ON tracker_leases(owner);
+CREATE TABLE IF NOT EXISTS tracker_instances (
+    owner TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
 """
 
 
+# One precomputed suggestion batch per user, served by the next /tasks.
+SUGGESTION_QUEUE = """
+CREATE TABLE IF NOT EXISTS suggestion_queue (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id),
+    fingerprint TEXT NOT NULL,
+    analysis TEXT NOT NULL,
+    tasks TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+# Premium-only problems; existing rows are refetched to fill the flag in.
+PROBLEMS_PAID_ONLY = """
+ALTER TABLE problems ADD COLUMN paid_only INTEGER NOT NULL DEFAULT 0;
+UPDATE problems SET updated_at = NULL;
+"""
+
+# Bumped whenever a user's tracker state is reset, so a poll that read the old
+# state can't write it back.
+USERS_TRACKER_EPOCH = """
+ALTER TABLE users ADD COLUMN tracker_epoch INTEGER NOT NULL DEFAULT 0;
+"""
+
+
+async def _backfill_user_stats(db: aiosqlite.Connection) -> None:
+    await db.execute("DELETE FROM user_stats")
+    await db.execute(REBUILD_USER_STATS, {"user_id": None})
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "initial schema", SCHEMA),
+    Migration(2, "backfill user_stats", _backfill_user_stats),
+    Migration(3, "indexes for hot query paths", INDEXES),
+    Migration(4, "tracker partition leases", TRACKER_LEASES),
+    Migration(5, "suggestion prefetch queue", SUGGESTION_QUEUE),
+    Migration(6, "premium-only problem flag", PROBLEMS_PAID_ONLY),
+    Migration(7, "tracker state reset epoch", USERS_TRACKER_EPOCH),
+]
+
+
+async def apply_pragmas(db: aiosqlite.Connection, readonly: bool = False) -> None:
+    if readonly:
+        await db.execute("PRAGMA query_only = ON")
+    else:
+        await db.execute(f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+        await db.execute(f"PRAGMA synchronous = {settings.sqlite_synchronous}")
+    await db.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}")
+    # A negative cache_size is in KiB rather than pages.
+    await db.execute(f"PRAGMA cache_size = {-int(settings.sqlite_cache_size_kib)}")
+    await db.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}")
+
+
 async def init_db(db_path: str) -> aiosqlite.Connection:
     db = await aiosqlite.connect(db_path)
     db.row_factory = aiosqlite.Row
-    await db.executescript(SCHEMA)
-    await db.commit()
+    await apply_pragmas(db)
+    await migrate(db, MIGRATIONS)
+    return db
+
+
+async def connect_reader(db_path: str) -> aiosqlite.Connection:
+    """Open a read-only connection; requires `init_db` to have run first."""
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    db = await aiosqlite.connect(uri, uri=True)
+    db.row_factory = aiosqlite.Row
+    await apply_pragmas(db, readonly=True)
     return db
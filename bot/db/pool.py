@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+
+import aiosqlite
+
+from bot import metrics
+
+READ_POOL = metrics.Gauge(
+    "bot_db_read_pool",
+    "Read pool state: size, idle, waiting, checkouts and checkout wait.",
+    ("stat",),
+)
+
+
+class ReadPool:
+    """Fixed-size pool of read-only connections with checkout metrics.
+
+    Each aiosqlite connection runs on its own thread, so reads checked out
+    from the pool don't queue behind the writer or behind each other.
+    """
+
+    def __init__(self, connections: list[aiosqlite.Connection]) -> None:
+        self._connections = connections
+        self._idle: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        for conn in connections:
+            self._idle.put_nowait(conn)
+        self.checkouts = 0
+        self.waiting = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        for stat in self.metrics():
+            READ_POOL.set_function(lambda stat=stat: self.metrics()[stat], stat)
+
+    @classmethod
+    async def open(
+        cls,
+        size: int,
+        connect: Callable[[], Awaitable[aiosqlite.Connection]],
+    ) -> ReadPool:
+        return cls([await connect() for _ in range(size)])
+
+    @property
+    def size(self) -> int:
+        return len(self._connections)
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            conn = await self._idle.get()
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - started
+        self.checkouts += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
+
+    def metrics(self) -> dict[str, float]:
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "waiting": self.waiting,
+            "checkouts": self.checkouts,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+
+    async def close(self) -> None:
+        for conn in self._connections:
+            await conn.close()
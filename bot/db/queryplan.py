@@ -0,0 +1,151 @@
+"""Check that every Repository query is served by an index.
+
+Runs each public `Repository` method against a scratch database, captures
+the SQL it executes and reports any `EXPLAIN QUERY PLAN` step that scans a
+table without an index. Exits non-zero on a finding, so it can gate CI:
+
+    python -m bot.db.queryplan
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from bot.db.models import init_db
+from bot.db.repository import Repository
+
+# Methods whose contract is a whole-table pass (maintenance and bulk loads).
+FULL_SCAN_ALLOWED = {
+    "get_all_problems",
+    "rebuild_stats",
+    # Lease tables hold one row per partition / tracker instance.
+    "claim_leases",
+    "count_live_instances",
+}
+
+# Public methods that manage transactions rather than run queries.
+NOT_QUERIES = {"transaction", "flush"}
+
+_SKIP_PREFIXES = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA")
+
+
+def _calls(repo: Repository) -> dict[str, Callable[[], Awaitable[Any]]]:
+    """One representative call per public Repository method."""
+    task = {"titleSlug": "two-sum", "difficulty": "Easy", "category": "Array"}
+    problem = {
+        "titleSlug": "two-sum",
+        "title": "Two Sum",
+        "difficulty": "Easy",
+        "topicTags": [{"name": "Array"}],
+    }
+    return {
+        "get_or_create_user": lambda: repo.get_or_create_user(1),
+        "set_leetcode_username": lambda: repo.set_leetcode_username(1, "alice"),
+        "get_user": lambda: repo.get_user(1),
+        "iter_tracked_users": lambda: _drain(repo.iter_tracked_users(chunk_size=1)),
+        "get_tracked_users_page": lambda: repo.get_tracked_users_page(
+            0, 100, partitions=[0, 1], partition_count=4, unscheduled_only=True
+        ),
+        "get_tracked_users": lambda: repo.get_tracked_users([1, 2]),
+        "save_tracker_states": lambda: repo.save_tracker_states([(1, None, 300, 0, 0)]),
+        "assign_task": lambda: repo.assign_task(1, "add-two-numbers", "Medium", "Linked List"),
+        "assign_tasks": lambda: repo.assign_tasks(1, [task]),
+        "get_pending_tasks": lambda: repo.get_pending_tasks(1),
+        "get_completed_tasks": lambda: repo.get_completed_tasks(1),
+        "complete_task": lambda: repo.complete_task(1),
+        "save_queued_suggestion": lambda: repo.save_queued_suggestion(
+            1, "f", "", [task], 0.0
+        ),
+        "get_queued_suggestion": lambda: repo.get_queued_suggestion(1),
+        "get_prefetch_candidates": lambda: repo.get_prefetch_candidates(0, 0.0, 20),
+        "get_stats": lambda: repo.get_stats(1),
+        "rebuild_stats": lambda: repo.rebuild_stats(1),
+        "get_completed_count_by_category": lambda: repo.get_completed_count_by_category(1),
+        "get_completed_count_by_difficulty": lambda: repo.get_completed_count_by_difficulty(1),
+        "get_total_completed": lambda: repo.get_total_completed(1),
+        "get_user_achievements": lambda: repo.get_user_achievements(1),
+        "unlock_achievement": lambda: repo.unlock_achievement(1, "hard_1"),
+        "unlock_achievements": lambda: repo.unlock_achievements(1, ["medium_1", "total_25"]),
+        "ensure_lease_partitions": lambda: repo.ensure_lease_partitions(4),
+        "heartbeat_instance": lambda: repo.heartbeat_instance("a", 60.0),
+        "count_live_instances": lambda: repo.count_live_instances(0.0),
+        "claim_leases": lambda: repo.claim_leases("a", 0.0, 60.0, 2),
+        "renew_leases": lambda: repo.renew_leases("a", 60.0),
+        "release_leases": lambda: repo.release_leases("a", [1]),
+        "remove_instance": lambda: repo.remove_instance("a"),
+        "upsert_problems": lambda: repo.upsert_problems([problem]),
+        "get_all_problems": repo.get_all_problems,
+        "get_problems_refreshed_at": repo.get_problems_refreshed_at,
+    }
+
+
+async def _drain(iterator: AsyncIterator[Any]) -> None:
+    async for _ in iterator:
+        pass
+
+
+def _public_methods() -> set[str]:
+    return {
+        name
+        for name, fn in inspect.getmembers(Repository, inspect.isfunction)
+        if not name.startswith("_") and name not in NOT_QUERIES
+    }
+
+
+def _full_scans(plan: list[tuple]) -> list[str]:
+    details = [row[-1] for row in plan]
+    return [
+        d
+        for d in details
+        if d.startswith("SCAN") and "INDEX" not in d and "CONSTANT ROW" not in d
+    ]
+
+
+async def check() -> list[str]:
+    problems: list[str] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = await init_db(str(Path(tmp) / "queryplan.db"))
+        try:
+            repo = Repository(db)
+            calls = _calls(repo)
+            missing = _public_methods() - calls.keys()
+            problems += [f"{name}: not exercised by this check" for name in sorted(missing)]
+
+            current = ""
+            statements: list[tuple[str, str]] = []
+            await db.set_trace_callback(lambda sql: statements.append((current, sql)))
+            for current, call in calls.items():
+                await call()
+            await db.set_trace_callback(None)
+
+            for method, sql in statements:
+                stripped = sql.lstrip()
+                if stripped.upper().startswith(_SKIP_PREFIXES):
+                    continue
+                cur = await db.execute(f"EXPLAIN QUERY PLAN {stripped}")
+                if method in FULL_SCAN_ALLOWED:
+                    continue
+                for scan in _full_scans(await cur.fetchall()):
+                    query = " ".join(stripped.split())
+                    problems.append(f"{method}: {scan}\n    {query}")
+        finally:
+            await db.close()
+    return problems
+
+
+def main() -> None:
+    problems = asyncio.run(check())
+    for problem in problems:
+        print(problem)
+    if problems:
+        sys.exit(1)
+    print("All Repository queries use indexes.")
+
+
+if __name__ == "__main__":
+    main()
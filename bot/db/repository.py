@@ -1,56 +1,388 @@
 from __future__ import annotations
 
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any
+from typing import Any, AsyncIterator
 
 import aiosqlite
 
+from bot import metrics
+from bot.db.group_commit import GroupCommitter
+from bot.db.models import REBUILD_USER_STATS
+from bot.db.pool import ReadPool
 
+
+QUERY_SECONDS = metrics.Histogram(
+    "bot_db_query_seconds",
+    "Repository method latency, including lock and pool waits.",
+    ("method",),
+)
+QUERY_ERRORS = metrics.Counter(
+    "bot_db_query_errors",
+    "Repository method calls that raised.",
+    ("method",),
+)
+
+
+@dataclass(slots=True)
+class UserStats:
+    by_category: dict[str, int] = field(default_factory=dict)
+    by_difficulty: dict[str, int] = field(default_factory=dict)
+    total: int = 0
+
+
+@dataclass(slots=True)
+class TrackedUser:
+    id: int
+    telegram_id: int
+    leetcode_username: str
+    watermark: int | None
+    poll_interval: int | None
+    next_poll_at: int | None
+    epoch: int
+
+
+# Columns in TrackedUser order; the EXISTS probe uses idx_assigned_tasks_pending.
+_TRACKED_USER_SELECT = """
+SELECT u.id, u.telegram_id, u.leetcode_username,
+       s.watermark, s.poll_interval, s.next_poll_at, u.tracker_epoch
+FROM users u
+LEFT JOIN tracker_state s ON s.user_id = u.id
+"""
+_TRACKED_USER_FILTER = """
+AND u.leetcode_username IS NOT NULL
+AND EXISTS (
+    SELECT 1 FROM assigned_tasks a
+    WHERE a.user_id = u.id AND a.completed_at IS NULL
+)
+"""
+
+
+@metrics.instrument_methods(QUERY_SECONDS, QUERY_ERRORS)
 class Repository:
-    def __init__(self, db: aiosqlite.Connection) -> None:
+    def __init__(
+        self,
+        db: aiosqlite.Connection,
+        group_commit_window: float = 0.0,
+        readers: ReadPool | None = None,
+    ) -> None:
         self.db = db
+        self.readers = readers
+        self._write_lock = asyncio.Lock()
+        self._in_transaction: ContextVar[bool] = ContextVar(
+            f"repository_{id(self)}_in_transaction", default=False
+        )
+        self._committer = (
+            GroupCommitter(db, self._write_lock, group_commit_window)
+            if group_commit_window > 0
+            else None
+        )
+
+    # ── Unit of Work ───────────────────────────────────────
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """Run the enclosed writes as one atomic unit with a single commit.
+
+        Nested calls, including every write method, join the outer unit.
+        Writes from other tasks wait until the unit ends. With group commit
+        enabled the final commit is shared with concurrent writers.
+        """
+        if self._in_transaction.get():
+            yield
+            return
+        async with self._write_lock:
+            token = self._in_transaction.set(True)
+            try:
+                began = not self.db.in_transaction
+                if began:
+                    await self.db.execute("BEGIN")
+                # A savepoint lets a failed unit roll back on its own without
+                # discarding other writers' work that awaits a group commit.
+                await self.db.execute("SAVEPOINT unit_of_work")
+                try:
+                    yield
+                except BaseException:
+                    await self.db.execute("ROLLBACK TO unit_of_work")
+                    await self.db.execute("RELEASE unit_of_work")
+                    # End the transaction we opened so the write lock is
+                    # released; a pending group commit ends it instead.
+                    if began and not (self._committer and self._committer.pending):
+                        await self.db.rollback()
+                    raise
+                await self.db.execute("RELEASE unit_of_work")
+                if self._committer is None:
+                    await self.db.commit()
+            finally:
+                self._in_transaction.reset(token)
+        if self._committer is not None:
+            await self._committer.commit()
+
+    async def flush(self) -> None:
+        """Commit writes still waiting for a group commit (e.g. on shutdown)."""
+        if self._committer is not None:
+            await self._committer.flush()
+
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """A pooled read-only connection.
+
+        Inside a unit of work this is the writer, so the unit sees its own
+        uncommitted changes.
+        """
+        if self.readers is None or self._in_transaction.get():
+            yield self.db
+            return
+        async with self.readers.connection() as db:
+            yield db
+
+    async def _fetchall(self, sql: str, params: Any = ()) -> list[aiosqlite.Row]:
+        async with self._reader() as db:
+            cur = await db.execute(sql, params)
+            return await cur.fetchall()
+
+    async def _fetchone(self, sql: str, params: Any = ()) -> aiosqlite.Row | None:
+        async with self._reader() as db:
+            cur = await db.execute(sql, params)
+            return await cur.fetchone()
 
     # ── Users ──────────────────────────────────────────────
 
     async def get_or_create_user(self, telegram_id: int) -> dict[str, Any]:
-        cur = await self.db.execute(
+        row = await self._fetchone(
             "SELECT * FROM users WHERE telegram_id = ?", (telegram_id,)
         )
-        row = await cur.fetchone()
         if row:
             return dict(row)
-        await self.db.execute(
-            "INSERT INTO users (telegram_id) VALUES (?)", (telegram_id,)
-        )
-        await self.db.commit()
-        cur = await self.db.execute(
+        async with self.transaction():
+            await self.db.execute(
+                "INSERT OR IGNORE INTO users (telegram_id) VALUES (?)", (telegram_id,)
+            )
+        row = await self._fetchone(
             "SELECT * FROM users WHERE telegram_id = ?", (telegram_id,)
         )
-        return dict(await cur.fetchone())
+        return dict(row)
 
     async def set_leetcode_username(self, telegram_id: int, username: str) -> None:
-        await self.db.execute(
-            "UPDATE users SET leetcode_username = ? WHERE telegram_id = ?",
-            (username, telegram_id),
-        )
-        await self.db.commit()
+        async with self.transaction():
+            await self.db.execute(
+                "UPDATE users SET leetcode_username = ? WHERE telegram_id = ?",
+                (username, telegram_id),
+            )
 
     async def get_user(self, telegram_id: int) -> dict[str, Any] | None:
-        cur = await self.db.execute(
+        row = await self._fetchone(
             "SELECT * FROM users WHERE telegram_id = ?", (telegram_id,)
         )
-        row = await cur.fetchone()
         return dict(row) if row else None
 
-    async def get_all_users_with_pending_tasks(self) -> list[dict[str, Any]]:
-        cur = await self.db.execute(
-            """
-            SELECT DISTINCT u.* FROM users u
-            JOIN assigned_tasks t ON t.user_id = u.id
-            WHERE t.completed_at IS NULL AND u.leetcode_username IS NOT NULL
-            """
+    async def iter_tracked_users(
+        self,
+        partitions: list[int] | None = None,
+        partition_count: int = 1,
+        unscheduled_only: bool = False,
+        chunk_size: int = 500,
+    ) -> AsyncIterator[TrackedUser]:
+        """Every user the tracker should poll, in `id` order, a chunk at a time.
+
+        Pages by keyset, so memory stays at one chunk however many users
+        there are, and no connection is held between chunks.
+        """
+        after_id = 0
+        while True:
+            chunk = await self.get_tracked_users_page(
+                after_id, chunk_size, partitions, partition_count, unscheduled_only
+            )
+            for user in chunk:
+                yield user
+            if len(chunk) < chunk_size:
+                return
+            after_id = chunk[-1].id
+
+    async def get_tracked_users_page(
+        self,
+        after_id: int,
+        limit: int,
+        partitions: list[int] | None = None,
+        partition_count: int = 1,
+        unscheduled_only: bool = False,
+    ) -> list[TrackedUser]:
+        """Up to `limit` users with pending tasks and `id > after_id`.
+
+        With `partitions`, only users whose `id % partition_count` is listed.
+        With `unscheduled_only`, only users without tracker state yet, i.e.
+        those assigned tasks since their last poll.
+        """
+        filters = ""
+        params: list[Any] = [after_id]
+        if unscheduled_only:
+            filters += " AND s.user_id IS NULL"
+        if partitions is not None:
+            placeholders = ", ".join("?" for _ in partitions)
+            filters += f" AND u.id % ? IN ({placeholders})"
+            params += [partition_count, *partitions]
+        rows = await self._fetchall(
+            f"""
+            {_TRACKED_USER_SELECT}
+            WHERE u.id > ?{filters} {_TRACKED_USER_FILTER}
+            ORDER BY u.id
+            LIMIT ?
+            """,
+            [*params, limit],
+        )
+        return [TrackedUser(*r) for r in rows]
+
+    async def get_tracked_users(self, user_ids: list[int]) -> list[TrackedUser]:
+        """Those of `user_ids` that still have pending tasks."""
+        if not user_ids:
+            return []
+        placeholders = ", ".join("?" for _ in user_ids)
+        rows = await self._fetchall(
+            f"""
+            {_TRACKED_USER_SELECT}
+            WHERE u.id IN ({placeholders}) {_TRACKED_USER_FILTER}
+            """,
+            user_ids,
+        )
+        return [TrackedUser(*r) for r in rows]
+
+    async def save_tracker_states(
+        self, states: list[tuple[int, int | None, int, int, int]]
+    ) -> set[int]:
+        """Upsert (user_id, watermark, poll_interval, next_poll_at, epoch) rows.
+
+        `epoch` is the `TrackedUser.epoch` the state was computed from. Users
+        whose state was reset since then are skipped and returned: their old
+        watermark could hide newly assigned tasks.
+        """
+        if not states:
+            return set()
+        async with self.transaction():
+            await self.db.executemany(
+                """
+                INSERT INTO tracker_state (user_id, watermark, poll_interval, next_poll_at)
+                SELECT :user_id, :watermark, :poll_interval, :next_poll_at
+                WHERE (SELECT tracker_epoch FROM users WHERE id = :user_id) = :epoch
+                ON CONFLICT(user_id) DO UPDATE SET
+                    watermark = excluded.watermark,
+                    poll_interval = excluded.poll_interval,
+                    next_poll_at = excluded.next_poll_at
+                """,
+                [
+                    {
+                        "user_id": user_id,
+                        "watermark": watermark,
+                        "poll_interval": poll_interval,
+                        "next_poll_at": next_poll_at,
+                        "epoch": epoch,
+                    }
+                    for user_id, watermark, poll_interval, next_poll_at, epoch in states
+                ],
+            )
+            # Under the write lock, so these are the epochs the upsert saw.
+            expected = {user_id: epoch for user_id, *_, epoch in states}
+            placeholders = ", ".join("?" for _ in expected)
+            cur = await self.db.execute(
+                f"SELECT id, tracker_epoch FROM users WHERE id IN ({placeholders})",
+                list(expected),
+            )
+            current = dict(await cur.fetchall())
+        return {u for u, epoch in expected.items() if current.get(u) != epoch}
+
+    async def _reset_tracker_state(self, user_id: int) -> None:
+        # New tasks may already be solved; poll right away with a full check.
+        await self.db.execute("DELETE FROM tracker_state WHERE user_id = ?", (user_id,))
+        await self.db.execute(
+            "UPDATE users SET tracker_epoch = tracker_epoch + 1 WHERE id = ?",
+            (user_id,),
+        )
+
+    # ── Tracker Leases ─────────────────────────────────────
+    # Each statement is atomic on its own, so instances in other processes
+    # can race on the same rows without a surrounding transaction.
+
+    async def ensure_lease_partitions(self, count: int) -> None:
+        async with self.transaction():
+            await self.db.executemany(
+                "INSERT OR IGNORE INTO tracker_leases (partition) VALUES (?)",
+                [(p,) for p in range(count)],
+            )
+
+    async def renew_leases(self, owner: str, expires_at: float) -> list[int]:
+        """Extend every lease still held by `owner`; returns those partitions."""
+        async with self.transaction():
+            cur = await self.db.execute(
+                """
+                UPDATE tracker_leases SET expires_at = ?
+                WHERE owner = ? RETURNING partition
+                """,
+                (expires_at, owner),
+            )
+            return [row["partition"] for row in await cur.fetchall()]
+
+    async def claim_leases(
+        self, owner: str, now: float, expires_at: float, limit: int
+    ) -> list[int]:
+        """Take up to `limit` free or expired partitions for `owner`."""
+        async with self.transaction():
+            cur = await self.db.execute(
+                """
+                UPDATE tracker_leases SET owner = ?, expires_at = ?
+                WHERE partition IN (
+                    SELECT partition FROM tracker_leases
+                    WHERE owner IS NULL OR expires_at <= ?
+                    ORDER BY partition LIMIT ?
+                )
+                RETURNING partition
+                """,
+                (owner, expires_at, now, limit),
+            )
+            return [row["partition"] for row in await cur.fetchall()]
+
+    async def release_leases(
+        self, owner: str, partitions: list[int] | None = None
+    ) -> None:
+        """Give up `partitions` (or all) held by `owner`."""
+        params: list[Any] = [owner]
+        partition_filter = ""
+        if partitions is not None:
+            partition_filter = f"AND partition IN ({', '.join('?' for _ in partitions)})"
+            params += partitions
+        async with self.transaction():
+            await self.db.execute(
+                f"""
+                UPDATE tracker_leases SET owner = NULL, expires_at = 0
+                WHERE owner = ? {partition_filter}
+                """,
+                params,
+            )
+
+    async def heartbeat_instance(self, owner: str, expires_at: float) -> None:
+        async with self.transaction():
+            await self.db.execute(
+                """
+                INSERT INTO tracker_instances (owner, expires_at) VALUES (?, ?)
+                ON CONFLICT(owner) DO UPDATE SET expires_at = excluded.expires_at
+                """,
+                (owner, expires_at),
+            )
+
+    async def remove_instance(self, owner: str) -> None:
+        async with self.transaction():
+            await self.db.execute(
+                "DELETE FROM tracker_instances WHERE owner = ?", (owner,)
+            )
+
+    async def count_live_instances(self, now: float) -> int:
+        row = await self._fetchone(
+            "SELECT COUNT(*) AS n FROM tracker_instances WHERE expires_at > ?",
+            (now,),
         )
-        return [dict(r) for r in await cur.fetchall()]
+        return row["n"]
 
     # ── Assigned Tasks ─────────────────────────────────────
 
@@ -61,83 +393,239 @@ class Repository:
         difficulty: str,
         category: str,
     ) -> int:
-        cur = await self.db.execute(
-            """
-            INSERT INTO assigned_tasks (user_id, leetcode_slug, difficulty, category)
-            VALUES (?, ?, ?, ?)
-            """,
-            (user_id, slug, difficulty, category),
-        )
-        await self.db.commit()
+        async with self.transaction():
+            cur = await self.db.execute(
+                """
+                INSERT INTO assigned_tasks (user_id, leetcode_slug, difficulty, category)
+                VALUES (?, ?, ?, ?)
+                """,
+                (user_id, slug, difficulty, category),
+            )
+            await self._reset_tracker_state(user_id)
+            await self._invalidate_suggestions(user_id)
         return cur.lastrowid
 
+    async def assign_tasks(self, user_id: int, tasks: list[dict[str, str]]) -> None:
+        """Assign several tasks (`titleSlug`, `difficulty`, `category`) in one commit."""
+        async with self.transaction():
+            await self.db.executemany(
+                """
+                INSERT INTO assigned_tasks (user_id, leetcode_slug, difficulty, category)
+                VALUES (?, ?, ?, ?)
+                """,
+                [(user_id, t["titleSlug"], t["difficulty"], t["category"]) for t in tasks],
+            )
+            await self._reset_tracker_state(user_id)
+            await self._invalidate_suggestions(user_id)
+
     async def get_pending_tasks(self, user_id: int) -> list[dict[str, Any]]:
-        cur = await self.db.execute(
+        rows = await self._fetchall(
             "SELECT * FROM assigned_tasks WHERE user_id = ? AND completed_at IS NULL",
             (user_id,),
         )
-        return [dict(r) for r in await cur.fetchall()]
+        return [dict(r) for r in rows]
 
     async def get_completed_tasks(self, user_id: int) -> list[dict[str, Any]]:
-        cur = await self.db.execute(
+        rows = await self._fetchall(
             "SELECT * FROM assigned_tasks WHERE user_id = ? AND completed_at IS NOT NULL",
             (user_id,),
         )
-        return [dict(r) for r in await cur.fetchall()]
+        return [dict(r) for r in rows]
 
     async def complete_task(self, task_id: int) -> None:
-        await self.db.execute(
-            "UPDATE assigned_tasks SET completed_at = ? WHERE id = ?",
-            (datetime.utcnow().isoformat(), task_id),
+        """Mark a task completed and bump the user's stats in the same commit."""
+        async with self.transaction():
+            cur = await self.db.execute(
+                """
+                UPDATE assigned_tasks SET completed_at = ?
+                WHERE id = ? AND completed_at IS NULL
+                RETURNING user_id, category, difficulty
+                """,
+                (datetime.utcnow().isoformat(), task_id),
+            )
+            row = await cur.fetchone()
+            if row:
+                await self.db.executemany(
+                    """
+                    INSERT INTO user_stats (user_id, dimension, key, count)
+                    VALUES (?, ?, ?, 1)
+                    ON CONFLICT(user_id, dimension, key) DO UPDATE SET count = count + 1
+                    """,
+                    [
+                        (row["user_id"], "category", row["category"]),
+                        (row["user_id"], "difficulty", row["difficulty"]),
+                        (row["user_id"], "total", ""),
+                    ],
+                )
+                await self._invalidate_suggestions(row["user_id"])
+
+    # ── Suggestion Queue ───────────────────────────────────
+
+    async def get_queued_suggestion(self, user_id: int) -> dict[str, Any] | None:
+        """The user's precomputed batch, with `tasks` decoded, if any."""
+        row = await self._fetchone(
+            "SELECT * FROM suggestion_queue WHERE user_id = ?", (user_id,)
         )
-        await self.db.commit()
+        if row is None:
+            return None
+        return {**dict(row), "tasks": json.loads(row["tasks"])}
 
-    async def get_completed_count_by_category(self, user_id: int) -> dict[str, int]:
-        cur = await self.db.execute(
+    async def save_queued_suggestion(
+        self,
+        user_id: int,
+        fingerprint: str,
+        analysis: str,
+        tasks: list[dict],
+        created_at: float,
+    ) -> None:
+        async with self.transaction():
+            await self.db.execute(
+                """
+                INSERT INTO suggestion_queue (user_id, fingerprint, analysis, tasks, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    fingerprint = excluded.fingerprint,
+                    analysis = excluded.analysis,
+                    tasks = excluded.tasks,
+                    created_at = excluded.created_at
+                """,
+                (user_id, fingerprint, analysis, json.dumps(tasks), created_at),
+            )
+
+    async def get_prefetch_candidates(
+        self, after_id: int, stale_before: float, limit: int
+    ) -> list[tuple[int, int]]:
+        """(id, telegram_id) of active users whose queued batch is missing or stale.
+
+        Active means registered with tasks still pending. Pages by keyset on
+        `id`, like `iter_tracked_users`.
+        """
+        rows = await self._fetchall(
             """
-            SELECT category, COUNT(*) as cnt FROM assigned_tasks
-            WHERE user_id = ? AND completed_at IS NOT NULL
-            GROUP BY category
+            SELECT u.id, u.telegram_id FROM users u
+            LEFT JOIN suggestion_queue q ON q.user_id = u.id
+            WHERE u.id > ?
+              AND u.leetcode_username IS NOT NULL
+              AND (q.user_id IS NULL OR q.created_at < ?)
+              AND EXISTS (
+                  SELECT 1 FROM assigned_tasks a
+                  WHERE a.user_id = u.id AND a.completed_at IS NULL
+              )
+            ORDER BY u.id
+            LIMIT ?
             """,
-            (user_id,),
+            (after_id, stale_before, limit),
         )
-        return {row["category"]: row["cnt"] for row in await cur.fetchall()}
+        return [(r["id"], r["telegram_id"]) for r in rows]
 
-    async def get_completed_count_by_difficulty(self, user_id: int) -> dict[str, int]:
-        cur = await self.db.execute(
-            """
-            SELECT difficulty, COUNT(*) as cnt FROM assigned_tasks
-            WHERE user_id = ? AND completed_at IS NOT NULL
-            GROUP BY difficulty
-            """,
-            (user_id,),
+    async def _invalidate_suggestions(self, user_id: int) -> None:
+        # The batch was picked against the old pending/completed sets.
+        await self.db.execute(
+            "DELETE FROM suggestion_queue WHERE user_id = ?", (user_id,)
         )
-        return {row["difficulty"]: row["cnt"] for row in await cur.fetchall()}
 
-    async def get_total_completed(self, user_id: int) -> int:
-        cur = await self.db.execute(
-            "SELECT COUNT(*) as cnt FROM assigned_tasks WHERE user_id = ? AND completed_at IS NOT NULL",
+    # ── Stats ──────────────────────────────────────────────
+
+    async def get_stats(self, user_id: int) -> UserStats:
+        """Completed counts by category, by difficulty and in total."""
+        rows = await self._fetchall(
+            "SELECT dimension, key, count FROM user_stats WHERE user_id = ?",
             (user_id,),
         )
-        row = await cur.fetchone()
-        return row["cnt"]
+        stats = UserStats()
+        for row in rows:
+            if row["dimension"] == "category":
+                stats.by_category[row["key"]] = row["count"]
+            elif row["dimension"] == "difficulty":
+                stats.by_difficulty[row["key"]] = row["count"]
+            else:
+                stats.total = row["count"]
+        return stats
+
+    async def rebuild_stats(self, user_id: int | None = None) -> None:
+        """Recompute `user_stats` from task history for one user or everyone."""
+        async with self.transaction():
+            await self.db.execute(
+                "DELETE FROM user_stats WHERE ? IS NULL OR user_id = ?",
+                (user_id, user_id),
+            )
+            await self.db.execute(REBUILD_USER_STATS, {"user_id": user_id})
+
+    async def get_completed_count_by_category(self, user_id: int) -> dict[str, int]:
+        return (await self.get_stats(user_id)).by_category
+
+    async def get_completed_count_by_difficulty(self, user_id: int) -> dict[str, int]:
+        return (await self.get_stats(user_id)).by_difficulty
+
+    async def get_total_completed(self, user_id: int) -> int:
+        return (await self.get_stats(user_id)).total
 
     # ── Achievements ───────────────────────────────────────
 
     async def get_user_achievements(self, user_id: int) -> list[dict[str, Any]]:
-        cur = await self.db.execute(
+        rows = await self._fetchall(
             "SELECT * FROM achievements WHERE user_id = ?", (user_id,)
         )
-        return [dict(r) for r in await cur.fetchall()]
+        return [dict(r) for r in rows]
 
     async def unlock_achievement(self, user_id: int, key: str) -> bool:
         """Returns True if newly unlocked, False if already existed."""
-        try:
-            await self.db.execute(
-                "INSERT INTO achievements (user_id, achievement_key) VALUES (?, ?)",
-                (user_id, key),
+        return key in await self.unlock_achievements(user_id, [key])
+
+    async def unlock_achievements(self, user_id: int, keys: list[str]) -> set[str]:
+        """Unlock several achievements in one statement; returns the new ones."""
+        if not keys:
+            return set()
+        async with self.transaction():
+            cur = await self.db.execute(
+                "INSERT OR IGNORE INTO achievements (user_id, achievement_key) VALUES "
+                + ", ".join("(?, ?)" for _ in keys)
+                + " RETURNING achievement_key",
+                [v for key in keys for v in (user_id, key)],
             )
-            await self.db.commit()
-            return True
-        except Exception:
-            return False
+            return {row["achievement_key"] for row in await cur.fetchall()}
+
+    # ── Problem Catalog ────────────────────────────────────
+
+    async def upsert_problems(
+        self, problems: list[dict[str, Any]], bulk: bool = True
+    ) -> None:
+        """Insert or refresh problems in the `validate_problem` response shape.
+
+        Only bulk loads stamp `updated_at`, so single lookups don't make a
+        partial catalog look fresh.
+        """
+        now = datetime.utcnow().isoformat() if bulk else None
+        async with self.transaction():
+            await self.db.executemany(
+                """
+                INSERT INTO problems
+                    (slug, title, difficulty, topic_tags, paid_only, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(slug) DO UPDATE SET
+                    title = excluded.title,
+                    difficulty = excluded.difficulty,
+                    topic_tags = excluded.topic_tags,
+                    paid_only = excluded.paid_only,
+                    updated_at = COALESCE(excluded.updated_at, problems.updated_at)
+                """,
+                [
+                    (
+                        p["titleSlug"],
+                        p["title"],
+                        p["difficulty"],
+                        json.dumps([t["name"] for t in p.get("topicTags") or []]),
+                        bool(p.get("paidOnly")),
+                        now,
+                    )
+                    for p in problems
+                ],
+            )
+
+    async def get_all_problems(self) -> list[dict[str, Any]]:
+        rows = await self._fetchall("SELECT * FROM problems")
+        return [dict(r) for r in rows]
+
+    async def get_problems_refreshed_at(self) -> str | None:
+        row = await self._fetchone("SELECT MIN(updated_at) AS ts FROM problems")
+        return row["ts"]
@@ -0,0 +1,25 @@
+from typing import Any
+
+from aiogram import Dispatcher
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from bot.handlers import start, tasks, progress, achievements
+from bot.middlewares.metrics import MetricsMiddleware
+
+
+def create_dispatcher(**services: Any) -> Dispatcher:
+    """Dispatcher with all routers; `services` are injected into handlers by name."""
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.message.middleware(MetricsMiddleware())
+    dp.callback_query.middleware(MetricsMiddleware())
+
+    # Register routers
+    dp.include_router(start.router)
+    dp.include_router(tasks.router)
+    dp.include_router(progress.router)
+    dp.include_router(achievements.router)
+
+    # Inject dependencies via dispatcher workflow data
+    for name, service in services.items():
+        dp[name] = service
+    return dp
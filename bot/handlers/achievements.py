@@ -27,9 +27,8 @@ async def _build_achievements_text(repo: Repository, telegram_id: int) -> str |
     unlocked = await repo.get_user_achievements(user["id"])
     unlocked_keys = {a["achievement_key"] for a in unlocked}
 
-    by_cat = await repo.get_completed_count_by_category(user["id"])
-    by_diff = await repo.get_completed_count_by_difficulty(user["id"])
-    total = await repo.get_total_completed(user["id"])
+    stats = await repo.get_stats(user["id"])
+    by_cat, by_diff, total = stats.by_category, stats.by_difficulty, stats.total
 
     lines = ["**Achievements**\n"]
 
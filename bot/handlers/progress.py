@@ -13,9 +13,8 @@ async def _build_progress_text(repo: Repository, telegram_id: int) -> str | None
     if not user or not user["leetcode_username"]:
         return None
 
-    total = await repo.get_total_completed(user["id"])
-    by_diff = await repo.get_completed_count_by_difficulty(user["id"])
-    by_cat = await repo.get_completed_count_by_category(user["id"])
+    stats = await repo.get_stats(user["id"])
+    total, by_diff, by_cat = stats.total, stats.by_difficulty, stats.by_category
     pending = await repo.get_pending_tasks(user["id"])
 
     lines = [f"**Progress for {user['leetcode_username']}**\n"]
@@ -7,6 +7,7 @@ from aiogram.types import CallbackQuery, Message
 from bot.db.repository import Repository
 from bot.keyboards.inline import main_menu
 from bot.services.leetcode import LeetCodeClient
+from bot.services.suggestions import SuggestionService
 
 router = Router()
 
@@ -39,6 +40,7 @@ async def process_username(
     state: FSMContext,
     repo: Repository,
     leetcode: LeetCodeClient,
+    suggestions: SuggestionService,
 ) -> None:
     username = message.text.strip()
     profile = await leetcode.get_user_profile(username)
@@ -51,6 +53,8 @@ async def process_username(
 
     await repo.set_leetcode_username(message.from_user.id, username)
     await state.clear()
+    # Have the first /tasks ready before they ask for it.
+    suggestions.request(message.from_user.id)
 
     stats = profile.get("submitStatsGlobal", {}).get("acSubmissionNum", [])
     stats_text = "\n".join(
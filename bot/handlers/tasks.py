@@ -1,87 +1,172 @@
+import asyncio
 import logging
+import time
 
 from aiogram import F, Router
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import CallbackQuery, Message
 from aiogram.filters import Command
 
+from bot.config import settings
 from bot.db.repository import Repository
 from bot.keyboards.inline import main_menu, task_links
-from bot.services.gpt import GPTService
-from bot.services.leetcode import LeetCodeClient
+from bot.services.scheduler import PollScheduler
+from bot.services.singleflight import SingleFlight
+from bot.services.suggestions import Progress, SuggestionService
 
 router = Router()
 logger = logging.getLogger(__name__)
 
+# Only successful suggestions are reused; error messages should be retryable.
+_suggestions: SingleFlight[int, str | tuple[str, list[dict]]] = SingleFlight(
+    ttl=settings.suggest_cooldown_seconds,
+    cache_if=lambda result: not isinstance(result, str),
+)
+
+
+class _LiveMessage:
+    """Edits one message with partial results, at most once per `interval`.
+
+    `update` never waits on Telegram: the newest text is sent right away or
+    when the interval allows, and intermediate texts are skipped.
+    """
+
+    def __init__(self, message: Message, interval: float) -> None:
+        self.message = message
+        self.interval = interval
+        self._text = message.text
+        self._pending: str | None = None
+        self._sent_at = 0.0
+        self._flush: asyncio.Task[None] | None = None
+        self._sending = False
+
+    def update(self, text: str) -> None:
+        self._pending = text
+        if self._flush is None:
+            self._flush = asyncio.create_task(self._send_pending())
+
+    async def close(self) -> None:
+        """Drop unsent updates; waits for an edit already on the wire."""
+        self._pending = None
+        if self._flush is None:
+            return
+        if not self._sending:
+            self._flush.cancel()
+        await asyncio.gather(self._flush, return_exceptions=True)
+
+    async def _send_pending(self) -> None:
+        try:
+            while self._pending is not None:
+                delay = self._sent_at + self.interval - time.monotonic()
+                await asyncio.sleep(max(delay, 0.0))
+                text, self._pending = self._pending, None
+                if text is None or text == self._text:
+                    continue
+                self._text = text
+                self._sent_at = time.monotonic()
+                self._sending = True
+                try:
+                    await self.message.edit_text(text, parse_mode="Markdown")
+                except TelegramBadRequest as e:
+                    logger.debug("Progress edit skipped: %s", e)
+                finally:
+                    self._sending = False
+        finally:
+            self._flush = None
+
+
+def _format_tasks(analysis: str, tasks: list[dict]) -> str:
+    text = f"**Analysis:** {analysis}\n\nHere are your tasks:\n"
+    for i, t in enumerate(tasks, 1):
+        text += f"\n{i}. **{t['titleSlug']}** [{t['difficulty']}] — {t['category']}"
+    return text
+
+
+def _format_progress(analysis: str, tasks: list[dict]) -> str:
+    if not tasks:
+        return f"**Analysis:** {analysis}\n\nPicking problems..."
+    tasks = [
+        {
+            "titleSlug": t.get("titleSlug", "?"),
+            "difficulty": t.get("difficulty", "?"),
+            "category": t.get("category", "?"),
+        }
+        for t in tasks
+    ]
+    return _format_tasks(analysis, tasks) + "\n\nChecking them against LeetCode..."
+
 
 async def _suggest_tasks(
     repo: Repository,
-    leetcode: LeetCodeClient,
-    gpt: GPTService,
+    suggestions: SuggestionService,
+    scheduler: PollScheduler | None,
     telegram_id: int,
+    progress: Progress | None = None,
 ) -> str | tuple[str, list[dict]]:
-    """Fetch data, call GPT, validate, save tasks. Returns message or (message, tasks)."""
+    """Take the user's next batch and save it. Returns message or (message, tasks)."""
     user = await repo.get_user(telegram_id)
     if not user or not user["leetcode_username"]:
         return "Please register first with /start"
 
-    username = user["leetcode_username"]
-
-    solved_stats = await leetcode.get_problems_solved(username)
-    skill_stats = await leetcode.get_skill_stats(username)
-
-    completed = await repo.get_completed_tasks(user["id"])
-    pending = await repo.get_pending_tasks(user["id"])
-    completed_slugs = [t["leetcode_slug"] for t in completed]
-    pending_slugs = [t["leetcode_slug"] for t in pending]
-
-    result = await gpt.suggest_tasks(
-        solved_stats, skill_stats, completed_slugs, pending_slugs
-    )
+    result = await suggestions.next(user, progress)
+    if isinstance(result, str):
+        return result
 
-    analysis = result.get("analysis", "")
-    tasks = result.get("tasks", [])
+    await repo.assign_tasks(user["id"], result.tasks)
+    if scheduler is not None:
+        scheduler.notify_assigned(user["id"])
+    suggestions.request(telegram_id)
 
-    if not tasks:
-        return "Couldn't generate task suggestions right now. Please try again later."
-
-    valid_tasks: list[dict] = []
-    for task in tasks[:3]:
-        slug = task.get("titleSlug", "")
-        problem = await leetcode.validate_problem(slug)
-        if problem:
-            difficulty = problem.get("difficulty", task.get("difficulty", "Medium"))
-            tags = problem.get("topicTags", [])
-            category = tags[0]["name"] if tags else task.get("category", "General")
-            await repo.assign_task(user["id"], slug, difficulty, category)
-            valid_tasks.append(
-                {"titleSlug": slug, "difficulty": difficulty, "category": category}
-            )
-
-    if not valid_tasks:
-        return "Couldn't validate suggested problems. Please try again."
+    return _format_tasks(result.analysis, result.tasks), result.tasks
 
-    text = f"**Analysis:** {analysis}\n\nHere are your tasks:\n"
-    for i, t in enumerate(valid_tasks, 1):
-        text += f"\n{i}. **{t['titleSlug']}** [{t['difficulty']}] — {t['category']}"
 
-    return text, valid_tasks
+async def _suggest_tasks_once(
+    repo: Repository,
+    suggestions: SuggestionService,
+    scheduler: PollScheduler | None,
+    telegram_id: int,
+    status: Message,
+) -> str | tuple[str, list[dict]]:
+    """Share one in-flight or recent suggestion per user across repeated taps.
+
+    Partial results stream into `status` while the batch is generated; the
+    caller replaces it with the final text.
+    """
+    live = _LiveMessage(status, settings.telegram_edit_interval_seconds)
+    try:
+        return await _suggestions.do(
+            telegram_id,
+            lambda: _suggest_tasks(
+                repo,
+                suggestions,
+                scheduler,
+                telegram_id,
+                lambda analysis, tasks: live.update(_format_progress(analysis, tasks)),
+            ),
+        )
+    finally:
+        await live.close()
 
 
 @router.message(Command("tasks"))
 async def cmd_tasks(
     message: Message,
     repo: Repository,
-    leetcode: LeetCodeClient,
-    gpt: GPTService,
+    suggestions: SuggestionService,
+    scheduler: PollScheduler | None = None,
 ) -> None:
-    await message.answer("Analyzing your profile and generating suggestions...")
-    result = await _suggest_tasks(repo, leetcode, gpt, message.from_user.id)
+    status = await message.answer(
+        "Analyzing your profile and generating suggestions..."
+    )
+    result = await _suggest_tasks_once(
+        repo, suggestions, scheduler, message.from_user.id, status
+    )
 
     if isinstance(result, str):
-        await message.answer(result, reply_markup=main_menu())
+        await status.edit_text(result, reply_markup=main_menu())
     else:
         text, tasks = result
-        await message.answer(
+        await status.edit_text(
             text, reply_markup=task_links(tasks), parse_mode="Markdown"
         )
 
@@ -90,15 +175,17 @@ async def cmd_tasks(
 async def callback_get_tasks(
     callback: CallbackQuery,
     repo: Repository,
-    leetcode: LeetCodeClient,
-    gpt: GPTService,
+    suggestions: SuggestionService,
+    scheduler: PollScheduler | None = None,
 ) -> None:
     await callback.message.edit_text(
         "Analyzing your profile and generating suggestions..."
     )
     await callback.answer()
 
-    result = await _suggest_tasks(repo, leetcode, gpt, callback.from_user.id)
+    result = await _suggest_tasks_once(
+        repo, suggestions, scheduler, callback.from_user.id, callback.message
+    )
 
     if isinstance(result, str):
         await callback.message.edit_text(result, reply_markup=main_menu())
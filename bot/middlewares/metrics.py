@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from bot import metrics
+
+HANDLER_SECONDS = metrics.Histogram(
+    "bot_handler_seconds",
+    "aiogram handler latency, by handler function.",
+    ("handler",),
+)
+HANDLER_ERRORS = metrics.Counter(
+    "bot_handler_errors",
+    "aiogram handler calls that raised.",
+    ("handler",),
+)
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Inner middleware timing each matched handler.
+
+    Register it on the dispatcher's observers; inner middlewares apply to
+    handlers of every included router.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        name = data["handler"].callback.__name__
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, name)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from datetime import datetime
+
+from bot.config import settings
+from bot.db.repository import Repository
+from bot.services.leetcode import LeetCodeClient
+
+logger = logging.getLogger(__name__)
+
+
+class ProblemCatalog:
+    """In-memory index of LeetCode problems backed by the `problems` table.
+
+    Entries use the same shape as `LeetCodeClient.validate_problem`, so a
+    lookup is a drop-in replacement for the network call. Only slugs the
+    catalog has never seen go to LeetCode.
+    """
+
+    def __init__(self, repo: Repository, leetcode: LeetCodeClient) -> None:
+        self.repo = repo
+        self.leetcode = leetcode
+        self._problems: dict[str, dict] = {}
+        self._missing: set[str] = set()
+        self._refreshed_at: datetime | None = None
+        # Bumped on every change, so derived indexes know to rebuild.
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._problems)
+
+    async def load(self) -> None:
+        """Build the in-memory index from the database."""
+        rows = await self.repo.get_all_problems()
+        self._problems = {row["slug"]: _from_row(row) for row in rows}
+        self.version += 1
+        ts = await self.repo.get_problems_refreshed_at()
+        self._refreshed_at = datetime.fromisoformat(ts) if ts else None
+        logger.info("Problem catalog loaded: %d problems", len(self._problems))
+
+    def _seconds_until_stale(self) -> float:
+        if self._refreshed_at is None:
+            return 0.0
+        age = (datetime.utcnow() - self._refreshed_at).total_seconds()
+        return settings.catalog_ttl_seconds - age
+
+    async def refresh(self) -> None:
+        """Bulk-load the whole problem set from LeetCode, page by page."""
+        page_size = settings.catalog_page_size
+        total, questions = await self.leetcode.get_problemset_page(0, page_size)
+        fetched = 0
+        while questions:
+            await self.repo.upsert_problems(questions)
+            for q in questions:
+                self._problems[q["titleSlug"]] = q
+            self.version += 1
+            fetched += len(questions)
+            if fetched >= total:
+                break
+            _, questions = await self.leetcode.get_problemset_page(fetched, page_size)
+        self._missing.clear()
+        self._refreshed_at = datetime.utcnow()
+        logger.info("Problem catalog refreshed: %d problems", fetched)
+
+    async def run_refresh(self) -> None:
+        """Background task that keeps the catalog within its TTL."""
+        while True:
+            delay = self._seconds_until_stale()
+            if delay <= 0:
+                try:
+                    await self.refresh()
+                except Exception:
+                    logger.exception("Problem catalog refresh error")
+                delay = settings.catalog_ttl_seconds
+            await asyncio.sleep(delay)
+
+    def problems(self) -> list[dict]:
+        return list(self._problems.values())
+
+    def lookup(self, slug: str) -> dict | None:
+        """In-process lookup only; never touches the network."""
+        return self._problems.get(slug)
+
+    async def get(self, slug: str) -> dict | None:
+        """Look up a problem, falling back to LeetCode for unseen slugs."""
+        problem = self._problems.get(slug)
+        if problem is not None or not slug or slug in self._missing:
+            return problem
+        problem = await self.leetcode.validate_problem(slug)
+        if problem is None:
+            self._missing.add(slug)
+            return None
+        await self.repo.upsert_problems([problem], bulk=False)
+        self._problems[slug] = problem
+        self.version += 1
+        return problem
+
+
+def _from_row(row: dict) -> dict:
+    return {
+        "titleSlug": row["slug"],
+        "title": row["title"],
+        "difficulty": row["difficulty"],
+        "paidOnly": bool(row["paid_only"]),
+        "topicTags": [{"name": name} for name in json.loads(row["topic_tags"])],
+    }
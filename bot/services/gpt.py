@@ -2,14 +2,41 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Any
+import time
+from typing import Any, AsyncIterator
 
 from openai import AsyncOpenAI
 
+from bot import metrics
 from bot.config import settings
+from bot.services.jsonstream import TaskStreamParser
+from bot.services.prompt import build_suggest_prompt, encode_solved, encode_tags
 
 logger = logging.getLogger(__name__)
 
+MODEL = "gpt-4o-mini"
+
+REQUEST_SECONDS = metrics.Histogram(
+    "bot_gpt_request_seconds",
+    "OpenAI chat completion latency.",
+    ("model",),
+)
+REQUEST_ERRORS = metrics.Counter(
+    "bot_gpt_request_errors",
+    "OpenAI requests that failed or returned unparseable JSON.",
+    ("model",),
+)
+FIRST_TASK_SECONDS = metrics.Histogram(
+    "bot_gpt_first_task_seconds",
+    "Time from a streamed request to its first complete suggested task.",
+    ("model",),
+)
+TOKENS = metrics.Counter(
+    "bot_gpt_tokens",
+    "Tokens reported by OpenAI usage, by kind (prompt or completion).",
+    ("model", "kind"),
+)
+
 SYSTEM_PROMPT = """\
 You are a coding interview coach. You analyze a user's LeetCode profile \
 and recommend specific problems to work on to improve their weak areas.
@@ -25,17 +52,27 @@ Always respond with valid JSON in the following format:
 }
 
 Rules:
-- Suggest exactly 3 problems.
+- Suggest exactly as many problems as asked for, best match first.
 - Each problem must be a real LeetCode problem with a valid titleSlug.
-- Don't suggest problems the user has already solved.
+- Don't suggest problems listed as already assigned.
 - Focus on weak areas — categories where the user has solved fewer problems.
 - Mix difficulties appropriately for the user's level.
 """
 
 
+ANALYSIS_PROMPT = """\
+You are a coding interview coach. Given a user's LeetCode profile and the \
+problems already picked for them, write a brief analysis (2-3 sentences) of \
+their strengths and weaknesses and why these problems help. Reply with the \
+analysis text only.
+"""
+
+
 class GPTService:
     def __init__(self) -> None:
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.client = AsyncOpenAI(
+            api_key=settings.openai_api_key, base_url=settings.openai_base_url
+        )
 
     async def suggest_tasks(
         self,
@@ -43,34 +80,128 @@ class GPTService:
         skill_stats: dict,
         completed_slugs: list[str],
         pending_slugs: list[str],
+        count: int = 3,
     ) -> dict[str, Any]:
-        already_assigned = set(completed_slugs) | set(pending_slugs)
-        user_prompt = f"""\
-User's solved problems by difficulty:
-{json.dumps(solved_stats, indent=2)}
-
-User's skill tag breakdown:
-{json.dumps(skill_stats, indent=2)}
-
-Already assigned/completed problem slugs (do NOT suggest these):
-{json.dumps(sorted(already_assigned))}
-
-Analyze this profile, identify 2-3 weak areas, and suggest exactly 3 \
-specific LeetCode problems to work on. Return valid JSON."""
-
-        response = await self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt},
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.7,
+        messages = build_suggest_prompt(
+            SYSTEM_PROMPT,
+            solved_stats,
+            skill_stats,
+            completed_slugs,
+            pending_slugs,
+            settings.gpt_prompt_token_budget,
+            count,
         )
+        try:
+            with REQUEST_SECONDS.time(MODEL):
+                response = await self.client.chat.completions.create(
+                    model=MODEL,
+                    messages=messages,
+                    response_format={"type": "json_object"},
+                    temperature=0.7,
+                )
+        except Exception:
+            REQUEST_ERRORS.inc(MODEL)
+            raise
+        _record_usage("suggest_tasks", response.usage)
 
         content = response.choices[0].message.content
         try:
             return json.loads(content)
         except json.JSONDecodeError:
+            REQUEST_ERRORS.inc(MODEL)
             logger.error("Failed to parse GPT response: %s", content)
             return {"analysis": "Error parsing response", "tasks": []}
+
+    async def stream_tasks(
+        self,
+        solved_stats: list[dict],
+        skill_stats: dict,
+        completed_slugs: list[str],
+        pending_slugs: list[str],
+        count: int = 3,
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """Streaming `suggest_tasks`: yields each value as soon as it completes.
+
+        Events are `("analysis", text)` and one `("task", obj)` per suggested
+        problem, in the order the model writes them.
+        """
+        messages = build_suggest_prompt(
+            SYSTEM_PROMPT,
+            solved_stats,
+            skill_stats,
+            completed_slugs,
+            pending_slugs,
+            settings.gpt_prompt_token_budget,
+            count,
+        )
+        parser = TaskStreamParser()
+        started = time.perf_counter()
+        first_task = True
+        try:
+            stream = await self.client.chat.completions.create(
+                model=MODEL,
+                messages=messages,
+                response_format={"type": "json_object"},
+                temperature=0.7,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            async with stream:
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        _record_usage("stream_tasks", chunk.usage)
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    for event in parser.feed(chunk.choices[0].delta.content):
+                        if event[0] == "task" and first_task:
+                            first_task = False
+                            FIRST_TASK_SECONDS.observe(
+                                time.perf_counter() - started, MODEL
+                            )
+                        yield event
+        except Exception:
+            REQUEST_ERRORS.inc(MODEL)
+            raise
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - started, MODEL)
+
+    async def write_analysis(
+        self, solved_stats: list[dict], skill_stats: dict, tasks: list[dict]
+    ) -> str:
+        """Analysis text for problems chosen elsewhere (no problem picking)."""
+        picks = ", ".join(
+            f"{t['titleSlug']} ({t['difficulty']}, {t['category']})" for t in tasks
+        )
+        user_prompt = (
+            f"Solved by difficulty: {encode_solved(solved_stats)}\n"
+            f"Weakest tags (problems solved): {', '.join(encode_tags(skill_stats))}\n"
+            f"Problems picked for them: {picks}"
+        )
+
+        try:
+            with REQUEST_SECONDS.time(MODEL):
+                response = await self.client.chat.completions.create(
+                    model=MODEL,
+                    messages=[
+                        {"role": "system", "content": ANALYSIS_PROMPT},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                    temperature=0.7,
+                    max_tokens=200,
+                )
+        except Exception:
+            REQUEST_ERRORS.inc(MODEL)
+            raise
+        _record_usage("write_analysis", response.usage)
+        return (response.choices[0].message.content or "").strip()
+
+
+def _record_usage(operation: str, usage: Any) -> None:
+    if usage is None:
+        return
+    TOKENS.inc(MODEL, "prompt", amount=usage.prompt_tokens)
+    TOKENS.inc(MODEL, "completion", amount=usage.completion_tokens)
+    logger.info(
+        "GPT %s: %d prompt + %d completion tokens",
+        operation, usage.prompt_tokens, usage.completion_tokens,
+    )
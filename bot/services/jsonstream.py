@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+
+class TaskStreamParser:
+    """Incremental parser for `{"analysis": "...", "tasks": [{...}, ...]}`.
+
+    `feed` takes the next chunk of a streamed completion and returns the
+    values it completed: `("analysis", text)` once the analysis string
+    closes, and `("task", obj)` for each object in the `tasks` array as soon
+    as its closing brace arrives. Other keys are skipped. Objects that fail
+    to parse are dropped, like invalid suggestions.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._pos = 0
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key: str | None = None
+        self._object_start = 0
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        self._text += chunk
+        text = self._text
+        events: list[tuple[str, Any]] = []
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        value = json.loads(text[self._string_start : i + 1])
+                        if self._expect_key:
+                            self._key = value
+                        elif self._key == "analysis":
+                            events.append(("analysis", value))
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                self._stack.append(c)
+                if len(self._stack) == 1:
+                    self._expect_key = True
+                elif self._in_task_object():
+                    self._object_start = i
+            elif c in "}]":
+                if c == "}" and self._in_task_object():
+                    try:
+                        events.append(
+                            ("task", json.loads(text[self._object_start : i + 1]))
+                        )
+                    except json.JSONDecodeError:
+                        pass
+                if self._stack:
+                    self._stack.pop()
+            elif len(self._stack) == 1:
+                if c == ":":
+                    self._expect_key = False
+                elif c == ",":
+                    self._expect_key = True
+        self._pos = len(text)
+        return events
+
+    def _in_task_object(self) -> bool:
+        return (
+            len(self._stack) == 3
+            and self._key == "tasks"
+            and self._stack[1] == "["
+            and self._stack[2] == "{"
+        )
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import socket
+import time
+import uuid
+
+from bot.db.repository import Repository
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseManager:
+    """Holds time-limited leases on hash partitions (`users.id % partitions`).
+
+    Every tracker instance runs one, in-process or in its own process. Each
+    round renews the partitions it holds, then claims free or expired ones or
+    releases extras, aiming for a fair share of `partitions / live instances`.
+    If an instance dies, its leases expire and the survivors take them over.
+    All instances must agree on `partitions`.
+    """
+
+    def __init__(
+        self,
+        repo: Repository,
+        partitions: int,
+        ttl: float,
+        owner: str | None = None,
+    ) -> None:
+        self.repo = repo
+        self.partitions = partitions
+        self.ttl = ttl
+        self.owner = owner or (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+        self.owned: frozenset[int] = frozenset()
+        self._valid_until = 0.0
+
+    def owns(self, user_id: int) -> bool:
+        return user_id % self.partitions in self.owned
+
+    def share(self) -> float:
+        """Fraction of all partitions currently held."""
+        return len(self.owned) / self.partitions
+
+    def valid(self) -> bool:
+        """Whether held leases are safely unexpired (with a margin for skew)."""
+        return bool(self.owned) and time.monotonic() < self._valid_until
+
+    async def rebalance(self) -> None:
+        started = time.monotonic()
+        now = time.time()
+        expires_at = now + self.ttl
+        await self.repo.heartbeat_instance(self.owner, expires_at)
+        owned = set(await self.repo.renew_leases(self.owner, expires_at))
+
+        live = max(await self.repo.count_live_instances(now), 1)
+        share = math.ceil(self.partitions / live)
+
+        if len(owned) < share:
+            owned |= set(
+                await self.repo.claim_leases(
+                    self.owner, now, expires_at, share - len(owned)
+                )
+            )
+        elif len(owned) > share:
+            extra = sorted(owned)[share:]
+            await self.repo.release_leases(self.owner, extra)
+            owned -= set(extra)
+
+        if owned != self.owned:
+            logger.info(
+                "Tracker %s holds %d/%d partitions",
+                self.owner,
+                len(owned),
+                self.partitions,
+            )
+        self.owned = frozenset(owned)
+        self._valid_until = started + self.ttl * 0.8
+
+    async def start(self) -> None:
+        await self.repo.ensure_lease_partitions(self.partitions)
+        await self.rebalance()
+
+    async def run(self) -> None:
+        """Background task that keeps leases renewed and balanced."""
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                await self.rebalance()
+            except Exception:
+                logger.exception("Lease rebalance error")
+
+    async def release(self) -> None:
+        self.owned = frozenset()
+        await self.repo.release_leases(self.owner)
+        await self.repo.remove_instance(self.owner)
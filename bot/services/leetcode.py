@@ -1,18 +1,94 @@
 from __future__ import annotations
 
+import functools
 import logging
+import re
+import time
 from typing import Any
 
 import aiohttp
 
+from bot import metrics
 from bot.config import settings
+from bot.services.cache import TTLCache
+from bot.services.ratelimit import TokenBucket
+from bot.services.singleflight import SingleFlight
+from bot.services.transport import AdaptiveConcurrency, CircuitBreaker, Transport
 
 logger = logging.getLogger(__name__)
 
+REQUEST_SECONDS = metrics.Histogram(
+    "bot_leetcode_request_seconds",
+    "LeetCode GraphQL request latency, including retries.",
+    ("operation",),
+)
+REQUEST_ERRORS = metrics.Counter(
+    "bot_leetcode_request_errors",
+    "LeetCode requests that failed or returned GraphQL errors.",
+    ("operation",),
+)
+CACHE_REQUESTS = metrics.Counter(
+    "bot_leetcode_cache_requests",
+    "Cached LeetCode lookups by operation and result (hit or miss).",
+    ("operation", "result"),
+)
+
+# One selection serves the profile, solved counts and skill tags, so all three
+# share a single request and cache entry per username.
+PROFILE_QUERY = """
+query userProfileStats($username: String!) {
+    matchedUser(username: $username) {
+        username
+        submitStatsGlobal {
+            acSubmissionNum {
+                difficulty
+                count
+            }
+        }
+        tagProblemCounts {
+            advanced { tagName problemsSolved }
+            intermediate { tagName problemsSolved }
+            fundamental { tagName problemsSolved }
+        }
+    }
+}
+"""
+
+_OPERATION_RE = re.compile(r"^\s*(?:query|mutation)\s+(\w+)")
+
+
+@functools.lru_cache(maxsize=256)
+def _operation_name(query: str) -> str:
+    match = _OPERATION_RE.match(query)
+    return match.group(1) if match else "anonymous"
+
 
 class LeetCodeClient:
-    def __init__(self, session: aiohttp.ClientSession | None = None) -> None:
+    def __init__(
+        self,
+        session: aiohttp.ClientSession | None = None,
+        rate_limiter: TokenBucket | None = None,
+    ) -> None:
         self._session = session
+        self._transport = Transport(
+            "leetcode",
+            rate_limiter=rate_limiter,
+            concurrency=AdaptiveConcurrency(
+                settings.leetcode_concurrency,
+                maximum=settings.leetcode_max_concurrency,
+            ),
+            breaker=CircuitBreaker(
+                settings.leetcode_breaker_threshold,
+                settings.leetcode_breaker_reset_seconds,
+            ),
+            timeout=settings.leetcode_timeout_seconds,
+            deadline=settings.leetcode_deadline_seconds,
+            max_attempts=settings.leetcode_max_attempts,
+            backoff_base=settings.leetcode_backoff_base_seconds,
+            backoff_max=settings.leetcode_backoff_max_seconds,
+        )
+        self.cache: TTLCache[tuple, dict] = TTLCache(settings.leetcode_cache_size)
+        self._inflight: SingleFlight[tuple, dict] = SingleFlight()
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
@@ -23,40 +99,80 @@ class LeetCodeClient:
         if self._session and not self._session.closed:
             await self._session.close()
 
-    async def _query(self, query: str, variables: dict[str, Any] | None = None) -> dict:
+    async def _post(self, query: str, variables: dict[str, Any] | None = None) -> dict:
+        """Send a GraphQL document and return the full response body.
+
+        Queries are retried by the transport; mutations are sent once.
+        """
+        operation = _operation_name(query)
         session = await self._get_session()
         payload: dict[str, Any] = {"query": query}
         if variables:
             payload["variables"] = variables
-        async with session.post(
-            settings.leetcode_graphql_url,
-            json=payload,
-            headers={"Content-Type": "application/json"},
-        ) as resp:
-            resp.raise_for_status()
-            data = await resp.json()
-            if "errors" in data:
-                logger.error("GraphQL errors: %s", data["errors"])
-            return data.get("data", {})
+        started = time.perf_counter()
+        try:
+            body = await self._transport.post_json(
+                session,
+                settings.leetcode_graphql_url,
+                payload,
+                idempotent=not query.lstrip().startswith("mutation"),
+            )
+        except Exception:
+            REQUEST_ERRORS.inc(operation)
+            raise
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - started, operation)
+        if "errors" in body:
+            REQUEST_ERRORS.inc(operation)
+        return body
 
-    # 1. Validate user + get profile
-    async def get_user_profile(self, username: str) -> dict | None:
-        query = """
-        query getUserProfile($username: String!) {
-            matchedUser(username: $username) {
-                username
-                submitStatsGlobal {
-                    acSubmissionNum {
-                        difficulty
-                        count
-                    }
-                }
-            }
-        }
+    async def _query(self, query: str, variables: dict[str, Any] | None = None) -> dict:
+        data = await self._post(query, variables)
+        if "errors" in data:
+            logger.error("GraphQL errors: %s", data["errors"])
+        return data.get("data") or {}
+
+    async def _cached_query(
+        self, query: str, variables: dict[str, Any], root: str, ttl: float
+    ) -> dict:
+        """`_query` through the response cache, keyed by operation and variables.
+
+        Concurrent misses for one key share a single request. Responses whose
+        `root` field is null (e.g. an unknown username) are cached for the
+        shorter negative TTL; responses without `root` are never cached.
         """
-        data = await self._query(query, {"username": username})
+        operation = _operation_name(query)
+        key = (operation, *sorted(variables.items()))
+        hit, data = self.cache.get(key)
+        if hit:
+            CACHE_REQUESTS.inc(operation, "hit")
+            return data
+        CACHE_REQUESTS.inc(operation, "miss")
+
+        async def fetch() -> dict:
+            data = await self._query(query, variables)
+            if root in data:
+                negative = data[root] is None
+                self.cache.set(
+                    key, data, settings.leetcode_negative_ttl_seconds if negative else ttl
+                )
+            return data
+
+        return await self._inflight.do(key, fetch)
+
+    async def _profile(self, username: str) -> dict | None:
+        data = await self._cached_query(
+            PROFILE_QUERY,
+            {"username": username},
+            "matchedUser",
+            settings.leetcode_profile_ttl_seconds,
+        )
         return data.get("matchedUser")
 
+    # 1. Validate user + get profile
+    async def get_user_profile(self, username: str) -> dict | None:
+        return await self._profile(username)
+
     # 2. Recent accepted submissions
     async def get_recent_submissions(
         self, username: str, limit: int = 20
@@ -73,45 +189,70 @@ class LeetCodeClient:
         data = await self._query(query, {"username": username, "limit": limit})
         return data.get("recentAcSubmissionList") or []
 
+    # 2b. Recent accepted submissions for many users in one request
+    async def get_recent_submissions_many(
+        self, usernames: list[str], limit: int = 20
+    ) -> dict[str, list[dict]]:
+        """Batch `recentAcSubmissionList` for several users via field aliases.
+
+        Users whose field came back with a GraphQL error are logged and left
+        out of the result, so callers can tell "no submissions" from "failed".
+        """
+        aliases = {f"u{i}": name for i, name in enumerate(dict.fromkeys(usernames))}
+        if not aliases:
+            return {}
+        var_defs = ", ".join(f"${alias}: String!" for alias in aliases)
+        fields = "\n".join(
+            f"{alias}: recentAcSubmissionList(username: ${alias}, limit: $limit) "
+            "{ titleSlug title timestamp }"
+            for alias in aliases
+        )
+        query = f"query recentAcSubmissionsBatch({var_defs}, $limit: Int!) {{\n{fields}\n}}"
+        body = await self._post(query, {**aliases, "limit": limit})
+
+        failed: dict[str, str] = {}
+        for error in body.get("errors") or []:
+            path = error.get("path") or []
+            if path and path[0] in aliases:
+                failed[aliases[path[0]]] = error.get("message", "")
+            else:
+                # Not tied to a field: the whole document failed.
+                logger.error("GraphQL batch error: %s", error)
+                return {}
+        for username, message in failed.items():
+            logger.error("GraphQL error for user %s: %s", username, message)
+
+        data = body.get("data") or {}
+        return {
+            username: data.get(alias) or []
+            for alias, username in aliases.items()
+            if username not in failed
+        }
+
     # 3. Problems solved by difficulty
     async def get_problems_solved(self, username: str) -> list[dict]:
-        query = """
-        query userProblemsSolved($username: String!) {
-            matchedUser(username: $username) {
-                submitStatsGlobal {
-                    acSubmissionNum {
-                        difficulty
-                        count
-                    }
-                }
-            }
-        }
-        """
-        data = await self._query(query, {"username": username})
-        user = data.get("matchedUser")
+        user = await self._profile(username)
         if not user:
             return []
         return user["submitStatsGlobal"]["acSubmissionNum"]
 
     # 4. Skill tags breakdown
     async def get_skill_stats(self, username: str) -> dict:
-        query = """
-        query skillStats($username: String!) {
-            matchedUser(username: $username) {
-                tagProblemCounts {
-                    advanced { tagName problemsSolved }
-                    intermediate { tagName problemsSolved }
-                    fundamental { tagName problemsSolved }
-                }
-            }
-        }
-        """
-        data = await self._query(query, {"username": username})
-        user = data.get("matchedUser")
+        user = await self._profile(username)
         if not user:
             return {}
         return user.get("tagProblemCounts", {})
 
+    # 3+4. Problems solved and skill tags together
+    async def get_profile_stats(self, username: str) -> tuple[list[dict], dict]:
+        user = await self._profile(username)
+        if not user:
+            return [], {}
+        return (
+            user["submitStatsGlobal"]["acSubmissionNum"],
+            user.get("tagProblemCounts", {}),
+        )
+
     # 5. Validate a problem exists by slug
     async def validate_problem(self, slug: str) -> dict | None:
         query = """
@@ -120,9 +261,46 @@ class LeetCodeClient:
                 titleSlug
                 title
                 difficulty
+                paidOnly: isPaidOnly
                 topicTags { name }
             }
         }
         """
         data = await self._query(query, {"titleSlug": slug})
         return data.get("question")
+
+    # 6. One page of the public problem set
+    async def get_problemset_page(
+        self, skip: int, limit: int = 100
+    ) -> tuple[int, list[dict]]:
+        query = """
+        query problemsetQuestionList($categorySlug: String, $limit: Int, $skip: Int, $filters: QuestionListFilterInput) {
+            problemsetQuestionList: questionList(
+                categorySlug: $categorySlug, limit: $limit, skip: $skip, filters: $filters
+            ) {
+                total: totalNum
+                questions: data {
+                    titleSlug
+                    title
+                    difficulty
+                    paidOnly
+                    topicTags { name }
+                }
+            }
+        }
+        """
+        data = await self._query(
+            query, {"categorySlug": "", "skip": skip, "limit": limit, "filters": {}}
+        )
+        page = data.get("problemsetQuestionList") or {}
+        return page.get("total") or 0, page.get("questions") or []
+
+
+def tag_counts(skill_stats: dict) -> dict[str, int]:
+    """`tagProblemCounts` flattened to {tag name: problems solved}."""
+    counts: dict[str, int] = {}
+    for level in skill_stats.values():
+        for entry in level or []:
+            name = entry["tagName"]
+            counts[name] = counts.get(name, 0) + entry["problemsSolved"]
+    return counts
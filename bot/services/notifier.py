@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+
+from bot.services.ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_LENGTH = 4096
+
+
+class Notifier:
+    """Outbound Telegram delivery that never makes the sender wait.
+
+    `send` only buffers the text. Everything queued for one chat within
+    `coalesce_window` seconds goes out as a single message. Delivery workers
+    share a global token bucket and keep `chat_interval` seconds between
+    messages to the same chat. A `RetryAfter` requeues that chat and pauses
+    the shared bucket for its duration, since flood waits are often bot-wide.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        messages_per_second: float,
+        chat_interval: float,
+        coalesce_window: float,
+        workers: int = 4,
+        parse_mode: str = "Markdown",
+    ) -> None:
+        self.bot = bot
+        self.chat_interval = chat_interval
+        self.coalesce_window = coalesce_window
+        self.parse_mode = parse_mode
+        self._limiter = TokenBucket(messages_per_second)
+        self._buffers: dict[int, list[str]] = {}
+        self._ready: asyncio.Queue[int] = asyncio.Queue()
+        self._next_send: dict[int, float] = {}
+        self._worker_count = workers
+        self._workers: list[asyncio.Task[None]] = []
+        self._sending = 0
+
+    def start(self) -> None:
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self._worker_count)
+        ]
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Deliver what is still buffered, for up to `timeout` seconds, then stop.
+
+        Completions are committed before their messages are queued, so
+        anything dropped here is never resent.
+        """
+        for chat_id in self._buffers:
+            # Skip the rest of the coalesce window.
+            self._ready.put_nowait(chat_id)
+        deadline = time.monotonic() + timeout
+        while (self._buffers or self._sending) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        if self._buffers:
+            logger.warning("Dropping unsent messages for %d chats", len(self._buffers))
+
+    def set_rate(self, messages_per_second: float) -> None:
+        """Change the global send rate, e.g. to this tracker's share of it."""
+        if messages_per_second != self._limiter.rate:
+            self._limiter.set_rate(messages_per_second)
+
+    def send(self, chat_id: int, text: str) -> None:
+        """Queue a message; returns immediately."""
+        self._enqueue(chat_id, [text], self.coalesce_window)
+
+    def _enqueue(self, chat_id: int, texts: list[str], delay: float) -> None:
+        buffer = self._buffers.get(chat_id)
+        if buffer is not None:
+            # Already scheduled: ride along with the pending flush.
+            buffer.extend(texts)
+            return
+        self._buffers[chat_id] = list(texts)
+        asyncio.get_running_loop().call_later(delay, self._ready.put_nowait, chat_id)
+
+    def _requeue(self, chat_id: int, texts: list[str], delay: float) -> None:
+        buffer = self._buffers.get(chat_id)
+        if buffer is not None:
+            buffer[:0] = texts
+        else:
+            self._enqueue(chat_id, texts, delay)
+
+    async def _worker(self) -> None:
+        while True:
+            chat_id = await self._ready.get()
+            texts = self._buffers.pop(chat_id, None)
+            if not texts:
+                continue
+
+            wait = self._next_send.get(chat_id, 0.0) - time.monotonic()
+            if wait > 0:
+                self._requeue(chat_id, texts, wait)
+                continue
+
+            text, rest = _pack(texts)
+            # Reserve the slot before awaiting so no other worker sends to
+            # this chat concurrently.
+            self._next_send[chat_id] = time.monotonic() + self.chat_interval
+            self._sending += 1
+            try:
+                await self._limiter.acquire()
+                await self.bot.send_message(chat_id, text, parse_mode=self.parse_mode)
+            except TelegramRetryAfter as e:
+                logger.warning(
+                    "Flood control for chat %s: retry in %ss", chat_id, e.retry_after
+                )
+                self._next_send[chat_id] = time.monotonic() + e.retry_after
+                self._requeue(chat_id, texts, e.retry_after)
+                self._limiter.pause(e.retry_after)
+                continue
+            except TelegramAPIError:
+                logger.exception("Failed to deliver message to chat %s", chat_id)
+            except Exception:
+                logger.exception("Error delivering message to chat %s", chat_id)
+            finally:
+                self._sending -= 1
+
+            if rest:
+                self._requeue(chat_id, rest, self.chat_interval)
+            elif len(self._next_send) > 10_000:
+                now = time.monotonic()
+                self._next_send = {c: t for c, t in self._next_send.items() if t > now}
+
+
+def _pack(texts: list[str]) -> tuple[str, list[str]]:
+    """Join as many texts as fit in one Telegram message; return the rest."""
+    joined = texts[0][:MAX_MESSAGE_LENGTH]
+    for i, text in enumerate(texts[1:], 1):
+        candidate = f"{joined}\n\n{text}"
+        if len(candidate) > MAX_MESSAGE_LENGTH:
+            return joined, texts[i:]
+        joined = candidate
+    return joined, []
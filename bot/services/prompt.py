@@ -0,0 +1,90 @@
+"""Token-budgeted prompts for GPTService.
+
+Profiles are encoded as compact text rather than indented JSON. Only the
+weakest tags and the most recent assigned slugs are listed, as many as the
+budget allows. Everything else the user was assigned is summarised as a
+count and filtered out locally after generation (see `SuggestionService`).
+"""
+
+from __future__ import annotations
+
+from bot.services.leetcode import tag_counts
+
+# Rough size of a token in English text and slugs; no tokenizer needed.
+CHARS_PER_TOKEN = 4
+# Tags past this many are rarely the weakest ones worth naming.
+MAX_TAGS = 12
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def encode_solved(solved_stats: list[dict]) -> str:
+    """`All 120, Easy 50, Medium 60, Hard 10`."""
+    if not solved_stats:
+        return "unknown"
+    return ", ".join(f"{s['difficulty']} {s['count']}" for s in solved_stats)
+
+
+def encode_tags(skill_stats: dict, limit: int = MAX_TAGS) -> list[str]:
+    """Up to `limit` tags as `Name count`, weakest first."""
+    counts = tag_counts(skill_stats)
+    weakest = sorted(counts.items(), key=lambda item: (item[1], item[0]))[:limit]
+    return [f"{name} {count}" for name, count in weakest]
+
+
+def build_suggest_prompt(
+    system: str,
+    solved_stats: list[dict],
+    skill_stats: dict,
+    completed_slugs: list[str],
+    pending_slugs: list[str],
+    budget: int,
+    count: int = 3,
+) -> list[dict[str, str]]:
+    """Chat messages for a suggestion request, within about `budget` tokens.
+
+    The fixed parts always go in. Weak tags then get up to half of what is
+    left, and recently assigned slugs (pending first, then the newest
+    completions) fill the rest. The assigned lists are oldest first.
+    """
+    head = f"Solved by difficulty: {encode_solved(solved_stats)}"
+    tail = (
+        f"Identify 2-3 weak areas and suggest exactly {count} LeetCode problems "
+        "the user has not been assigned, ranked best first. Return valid JSON."
+    )
+    remaining = budget - estimate_tokens(system) - estimate_tokens(head + tail)
+
+    lines = [head]
+    tags = _take(encode_tags(skill_stats), max(remaining // 2, 0))
+    if tags:
+        lines.append("Weakest tags (problems solved): " + ", ".join(tags))
+        remaining -= estimate_tokens(lines[-1])
+
+    recent = [*reversed(pending_slugs), *reversed(completed_slugs)]
+    label = "Already assigned, do not suggest: "
+    summary = "(+{} older assigned problems, filtered out automatically)"
+    reserve = estimate_tokens(label) + estimate_tokens(summary.format(len(recent)))
+    shown = _take(recent, remaining - reserve)
+    if shown:
+        lines.append(label + ", ".join(shown))
+    if len(recent) > len(shown):
+        lines.append(summary.format(len(recent) - len(shown)))
+    lines.append(tail)
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": "\n".join(lines)},
+    ]
+
+
+def _take(items: list[str], budget: int) -> list[str]:
+    """The longest prefix of `items` whose comma-joined text fits `budget` tokens."""
+    taken: list[str] = []
+    used = 0
+    for item in items:
+        used += len(item) + 2
+        if used // CHARS_PER_TOKEN > budget:
+            break
+        taken.append(item)
+    return taken
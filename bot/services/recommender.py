@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Collection
+
+import numpy as np
+
+from bot.services.catalog import ProblemCatalog
+from bot.services.leetcode import tag_counts
+
+logger = logging.getLogger(__name__)
+
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+
+# Target share of Easy/Medium/Hard picks by total problems solved.
+_DIFFICULTY_LADDER = (
+    (50, np.array([0.6, 0.35, 0.05])),
+    (300, np.array([0.25, 0.55, 0.2])),
+    (None, np.array([0.1, 0.5, 0.4])),
+)
+# Once a pick covers a tag or difficulty, it counts this much less for the next.
+_DIVERSITY_DAMPING = 0.5
+_JITTER = 0.05
+
+
+class Recommender:
+    """Scores catalog problems against a user's weak tags, locally.
+
+    The catalog is held as a dense tag×problem 0/1 matrix, rebuilt whenever
+    the catalog changes. A suggestion is then a matrix-vector product of tag
+    weakness against that matrix, weighted by how well each problem's
+    difficulty fits the user's solved mix, with already-assigned problems
+    masked out. Premium-only problems are left out of the matrix.
+    """
+
+    def __init__(self, catalog: ProblemCatalog, seed: int | None = None) -> None:
+        self.catalog = catalog
+        self._rng = np.random.default_rng(seed)
+        self._version = -1
+        self._slugs: list[str] = []
+        self._columns: dict[str, int] = {}
+        self._tags: list[str] = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._difficulty = np.zeros(0, dtype=np.int8)
+        self._norm = np.zeros(0, dtype=np.float32)
+
+    def _build(self) -> None:
+        problems = [p for p in self.catalog.problems() if not p.get("paidOnly")]
+        tags = sorted({t["name"] for p in problems for t in p.get("topicTags", [])})
+        rows = {name: i for i, name in enumerate(tags)}
+        matrix = np.zeros((len(tags), len(problems)), dtype=np.float32)
+        difficulty = np.zeros(len(problems), dtype=np.int8)
+        for col, problem in enumerate(problems):
+            for tag in problem.get("topicTags", []):
+                matrix[rows[tag["name"]], col] = 1.0
+            level = problem.get("difficulty")
+            difficulty[col] = DIFFICULTIES.index(level) if level in DIFFICULTIES else 1
+        self._slugs = [p["titleSlug"] for p in problems]
+        self._columns = {slug: col for col, slug in enumerate(self._slugs)}
+        self._tags = tags
+        self._matrix = matrix
+        self._difficulty = difficulty
+        # Multi-tag problems shouldn't win on tag count alone.
+        self._norm = 1.0 / np.sqrt(np.maximum(matrix.sum(axis=0), 1.0))
+        self._version = self.catalog.version
+        logger.info("Recommender built: %d tags x %d problems", len(tags), len(problems))
+
+    def weak_tags(self, skill_stats: dict, limit: int = 3) -> list[str]:
+        """Catalog tags the user has solved the fewest problems in."""
+        if self._version != self.catalog.version:
+            self._build()
+        solved = tag_counts(skill_stats)
+        return sorted(self._tags, key=lambda tag: solved.get(tag, 0))[:limit]
+
+    def suggest(
+        self,
+        solved_stats: list[dict],
+        skill_stats: dict,
+        exclude: Collection[str],
+        count: int = 3,
+    ) -> list[dict]:
+        """Up to `count` unassigned problems, as `{titleSlug, difficulty, category}`."""
+        if self._version != self.catalog.version:
+            self._build()
+        if not self._slugs:
+            return []
+
+        solved = tag_counts(skill_stats)
+        weakness = np.array(
+            [1.0 / np.sqrt(1.0 + solved.get(tag, 0)) for tag in self._tags],
+            dtype=np.float32,
+        )
+        level_fit = _difficulty_fit(solved_stats)
+
+        available = np.ones(len(self._slugs), dtype=bool)
+        excluded = [self._columns[s] for s in exclude if s in self._columns]
+        available[excluded] = False
+
+        picks: list[dict] = []
+        while len(picks) < count and available.any():
+            scores = weakness @ self._matrix
+            scores *= self._norm * level_fit[self._difficulty]
+            scores *= 1.0 + self._rng.uniform(0, _JITTER, scores.shape)
+            scores[~available] = -np.inf
+            col = int(np.argmax(scores))
+            available[col] = False
+
+            tag_rows = np.flatnonzero(self._matrix[:, col])
+            category = (
+                self._tags[tag_rows[np.argmax(weakness[tag_rows])]]
+                if tag_rows.size
+                else "General"
+            )
+            picks.append(
+                {
+                    "titleSlug": self._slugs[col],
+                    "difficulty": DIFFICULTIES[self._difficulty[col]],
+                    "category": category,
+                }
+            )
+            weakness[tag_rows] *= _DIVERSITY_DAMPING
+            level_fit[self._difficulty[col]] *= _DIVERSITY_DAMPING
+        return picks
+
+
+def local_analysis(weak_tags: list[str]) -> str:
+    """Template analysis for picks made without GPT."""
+    if not weak_tags:
+        return "Here is a balanced set of problems to keep you practising."
+    focus = ", ".join(weak_tags)
+    return f"You have solved the fewest problems in {focus}, so these picks focus there."
+
+
+def _difficulty_fit(solved_stats: list[dict]) -> np.ndarray:
+    """Per-difficulty weight: the target mix, boosted where the user lags it."""
+    solved = {s["difficulty"]: s["count"] for s in solved_stats}
+    counts = np.array([solved.get(d, 0) for d in DIFFICULTIES], dtype=np.float32)
+    total = counts.sum()
+    for limit, target in _DIFFICULTY_LADDER:
+        if limit is None or total < limit:
+            break
+    share = counts / total if total else np.zeros(3, dtype=np.float32)
+    return (target * (1.0 + np.maximum(target - share, 0.0))).astype(np.float32)
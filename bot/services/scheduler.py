@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import random
+import time
+
+from bot.db.repository import Repository
+
+logger = logging.getLogger(__name__)
+
+
+class PollScheduler:
+    """Min-heap of (due_at, user_id) for the users this tracker polls.
+
+    Each user has at most one live entry; rescheduling or removing a user
+    leaves the old heap entry behind to be skipped when it surfaces. Only
+    users in `partitions` (`user_id % partition_count`) are tracked.
+    """
+
+    def __init__(self, partition_count: int) -> None:
+        self.partition_count = partition_count
+        self.partitions: frozenset[int] = frozenset()
+        self._heap: list[tuple[float, int]] = []
+        self._due: dict[int, float] = {}
+        self._wakeup = asyncio.Event()
+        self._sleep_until = 0.0
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._due
+
+    def owns(self, user_id: int) -> bool:
+        return user_id % self.partition_count in self.partitions
+
+    def schedule(self, user_id: int, due_at: float) -> None:
+        self._due[user_id] = due_at
+        heapq.heappush(self._heap, (due_at, user_id))
+        if len(self._heap) > 2 * len(self._due) + 1024:
+            self._compact()
+        if due_at < self._sleep_until:
+            self._wakeup.set()
+
+    def remove(self, user_id: int) -> None:
+        self._due.pop(user_id, None)
+
+    def notify_assigned(self, user_id: int) -> None:
+        """New tasks were assigned: poll the user soon if we track them."""
+        if self.owns(user_id):
+            self.schedule(user_id, time.time())
+
+    def pop_due(self, until: float, limit: int) -> list[int]:
+        """Remove and return up to `limit` users due at or before `until`."""
+        users: list[int] = []
+        while self._heap and len(users) < limit and self._heap[0][0] <= until:
+            due_at, user_id = heapq.heappop(self._heap)
+            if self._due.get(user_id) != due_at:
+                continue
+            del self._due[user_id]
+            users.append(user_id)
+        return users
+
+    def next_due(self) -> float | None:
+        while self._heap:
+            due_at, user_id = self._heap[0]
+            if self._due.get(user_id) == due_at:
+                return due_at
+            heapq.heappop(self._heap)
+        return None
+
+    async def wait(self, timeout: float) -> None:
+        """Sleep up to `timeout` seconds, waking early for anything due sooner."""
+        timeout = max(timeout, 0.0)
+        self._sleep_until = time.time() + timeout
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._sleep_until = 0.0
+
+    def set_partitions(self, partitions: frozenset[int]) -> frozenset[int]:
+        """Track `partitions` from now on; returns the newly gained ones."""
+        gained = partitions - self.partitions
+        lost = self.partitions - partitions
+        self.partitions = partitions
+        if lost:
+            self._due = {u: t for u, t in self._due.items() if self.owns(u)}
+            self._compact()
+        return gained
+
+    async def load(
+        self,
+        repo: Repository,
+        partitions: frozenset[int],
+        spread: float,
+        unscheduled_only: bool = False,
+    ) -> int:
+        """Schedule users in `partitions` from the database.
+
+        Users keep their persisted `next_poll_at`. Overdue or never-polled
+        users are spread uniformly over the next `spread` seconds, so a
+        restart or takeover doesn't poll them all at once. Users already
+        scheduled only move earlier.
+        """
+        if not partitions:
+            return 0
+        loaded = 0
+        now = time.time()
+        async for user in repo.iter_tracked_users(
+            sorted(partitions), self.partition_count, unscheduled_only
+        ):
+            loaded += 1
+            if not self.owns(user.id):
+                continue
+            if user.next_poll_at is None or user.next_poll_at <= now:
+                due_at = now + random.uniform(0, spread)
+            else:
+                due_at = float(user.next_poll_at)
+            current = self._due.get(user.id)
+            if current is None or due_at < current:
+                self.schedule(user.id, due_at)
+        return loaded
+
+    def _compact(self) -> None:
+        self._heap = [(t, u) for u, t in self._due.items()]
+        heapq.heapify(self._heap)
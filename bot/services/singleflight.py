@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SingleFlight(Generic[K, V]):
+    """Coalesce concurrent calls per key and reuse results for `ttl` seconds.
+
+    Callers for a key that is already running await the same task instead of
+    starting a new one. A caller being cancelled never cancels the shared task.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 0.0,
+        cache_if: Callable[[V], bool] | None = None,
+    ) -> None:
+        self.ttl = ttl
+        self._cache_if = cache_if
+        self._inflight: dict[K, asyncio.Task[V]] = {}
+        self._results: dict[K, tuple[float, V]] = {}
+        self._prune_at = 1024
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[V]]) -> V:
+        cached = self._results.get(key)
+        if cached is not None:
+            if time.monotonic() < cached[0]:
+                return cached[1]
+            del self._results[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task)
+
+    def forget(self, key: K) -> None:
+        """Drop a cached result so the next call runs again."""
+        self._results.pop(key, None)
+
+    def _finish(self, key: K, task: asyncio.Task[V]) -> None:
+        self._inflight.pop(key, None)
+        if self.ttl <= 0 or task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if self._cache_if is not None and not self._cache_if(result):
+            return
+        now = time.monotonic()
+        self._results[key] = (now + self.ttl, result)
+        if len(self._results) > self._prune_at:
+            self._results = {k: v for k, v in self._results.items() if v[0] > now}
+            self._prune_at = max(1024, 2 * len(self._results))
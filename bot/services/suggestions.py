@@ -0,0 +1,362 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable
+
+from bot import metrics
+from bot.config import settings
+from bot.db.repository import Repository
+from bot.services.catalog import ProblemCatalog
+from bot.services.gpt import GPTService
+from bot.services.leetcode import LeetCodeClient
+from bot.services.recommender import Recommender, local_analysis
+
+logger = logging.getLogger(__name__)
+
+SERVED = metrics.Counter(
+    "bot_suggestions_served",
+    "Suggestion batches handed out, by source (queued, stale, generated).",
+    ("source",),
+)
+REJECTED = metrics.Counter(
+    "bot_suggestions_rejected",
+    "GPT-suggested problems dropped, by reason (assigned, duplicate, invalid, error).",
+    ("reason",),
+)
+PREFETCH_SECONDS = metrics.Histogram(
+    "bot_suggestion_prefetch_seconds",
+    "Time to precompute one user's next suggestion batch.",
+)
+PREFETCH_BACKLOG = metrics.Gauge(
+    "bot_suggestion_prefetch_backlog",
+    "Users waiting for a background suggestion prefetch.",
+)
+
+
+# Tasks per batch.
+TASK_COUNT = 3
+
+# Called with (analysis, tasks so far) while a batch is being generated.
+Progress = Callable[[str, list[dict]], None]
+
+
+@dataclass(slots=True)
+class Suggestion:
+    analysis: str
+    tasks: list[dict]
+
+
+def fingerprint(pending_slugs: list[str], completed_slugs: list[str]) -> str:
+    """Identifies the pending/completed sets a batch was picked against."""
+    key = ",".join(sorted(pending_slugs)) + "|" + ",".join(sorted(completed_slugs))
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+class SuggestionService:
+    """Picks users' next tasks, keeping one batch per user ready in advance.
+
+    `next` serves the user's queued batch when it is fresh and was picked
+    against their current pending/completed tasks, and generates one on the
+    spot otherwise. `request` schedules a background refill; `run` works
+    through those requests and, when idle, refreshes active users whose
+    batch is missing or past half its TTL.
+    """
+
+    def __init__(
+        self,
+        repo: Repository,
+        leetcode: LeetCodeClient,
+        catalog: ProblemCatalog,
+        gpt: GPTService | None,
+        recommender: Recommender,
+    ) -> None:
+        self.repo = repo
+        self.leetcode = leetcode
+        self.catalog = catalog
+        self.gpt = gpt
+        self.recommender = recommender
+        self._requests: asyncio.Queue[int] = asyncio.Queue()
+        self._requested: set[int] = set()
+        PREFETCH_BACKLOG.set_function(lambda: len(self._requested))
+
+    async def next(
+        self, user: dict, progress: Progress | None = None
+    ) -> Suggestion | str:
+        """The user's next batch, or a message explaining why there is none.
+
+        When the batch is generated on the spot, `progress` is called with
+        the analysis and tasks so far as they stream in.
+        """
+        # Fetched alongside the DB reads in case the queue misses; dropped on a hit.
+        profile = asyncio.create_task(
+            self.leetcode.get_profile_stats(user["leetcode_username"])
+        )
+        try:
+            async with asyncio.TaskGroup() as tg:
+                completed = tg.create_task(self.repo.get_completed_tasks(user["id"]))
+                pending = tg.create_task(self.repo.get_pending_tasks(user["id"]))
+                queued = tg.create_task(self.repo.get_queued_suggestion(user["id"]))
+            completed_slugs = [t["leetcode_slug"] for t in completed.result()]
+            pending_slugs = [t["leetcode_slug"] for t in pending.result()]
+
+            entry = queued.result()
+            if entry is not None:
+                fresh = (
+                    time.time() - entry["created_at"] < settings.suggest_queue_ttl_seconds
+                )
+                if fresh and entry["fingerprint"] == fingerprint(
+                    pending_slugs, completed_slugs
+                ):
+                    SERVED.inc("queued")
+                    return Suggestion(entry["analysis"], entry["tasks"])
+                SERVED.inc("stale")
+            else:
+                SERVED.inc("generated")
+            solved_stats, skill_stats = await profile
+        finally:
+            if not profile.done():
+                profile.cancel()
+            elif not profile.cancelled():
+                # Retrieved so an unneeded failed fetch isn't reported as lost.
+                profile.exception()
+        result = await self._generate(
+            solved_stats, skill_stats, pending_slugs, completed_slugs, progress
+        )
+        if isinstance(result, str):
+            # Have a batch ready by the time the user retries.
+            self.request(user["telegram_id"])
+        return result
+
+    def request(self, telegram_id: int) -> None:
+        """Precompute the user's next batch in the background."""
+        if not settings.suggest_prefetch or telegram_id in self._requested:
+            return
+        self._requested.add(telegram_id)
+        self._requests.put_nowait(telegram_id)
+
+    async def prefetch(self, telegram_id: int) -> None:
+        user = await self.repo.get_user(telegram_id)
+        if not user or not user["leetcode_username"]:
+            return
+        with PREFETCH_SECONDS.time():
+            async with asyncio.TaskGroup() as tg:
+                completed = tg.create_task(self.repo.get_completed_tasks(user["id"]))
+                pending = tg.create_task(self.repo.get_pending_tasks(user["id"]))
+                profile = tg.create_task(
+                    self.leetcode.get_profile_stats(user["leetcode_username"])
+                )
+            completed_slugs = [t["leetcode_slug"] for t in completed.result()]
+            pending_slugs = [t["leetcode_slug"] for t in pending.result()]
+            solved_stats, skill_stats = profile.result()
+            result = await self._generate(
+                solved_stats, skill_stats, pending_slugs, completed_slugs
+            )
+        if isinstance(result, str):
+            logger.info("Prefetch for user %d produced nothing: %s", user["id"], result)
+            return
+        await self.repo.save_queued_suggestion(
+            user["id"],
+            fingerprint(pending_slugs, completed_slugs),
+            result.analysis,
+            result.tasks,
+            time.time(),
+        )
+
+    async def run(self, refresh_stale: bool = True) -> None:
+        """Background task: serve refill requests and keep active users' batches fresh.
+
+        With `refresh_stale` off (standalone trackers), only explicit requests
+        are served; the bot process refreshes stale batches.
+        """
+        if not settings.suggest_prefetch:
+            return
+        workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(settings.suggest_prefetch_concurrency)
+        ]
+        after_id = 0
+        try:
+            while True:
+                await asyncio.sleep(settings.suggest_prefetch_interval_seconds)
+                if not refresh_stale or self._requested:
+                    # Low priority: explicit requests go first.
+                    continue
+                try:
+                    after_id = await self._refresh_stale(after_id)
+                except Exception:
+                    logger.exception("Suggestion refresh error")
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def drain(self) -> None:
+        """Wait until every requested prefetch has run (requires `run`)."""
+        await self._requests.join()
+
+    async def _refresh_stale(self, after_id: int) -> int:
+        """Request one page of stale users; returns the cursor for the next page."""
+        stale_before = time.time() - settings.suggest_queue_ttl_seconds / 2
+        limit = settings.suggest_prefetch_batch_size
+        page = await self.repo.get_prefetch_candidates(after_id, stale_before, limit)
+        for _, telegram_id in page:
+            self.request(telegram_id)
+        # Wrap around once the last page is reached.
+        return page[-1][0] if len(page) == limit else 0
+
+    async def _worker(self) -> None:
+        while True:
+            telegram_id = await self._requests.get()
+            # A request arriving mid-prefetch may follow a state change: requeue it.
+            self._requested.discard(telegram_id)
+            try:
+                await self.prefetch(telegram_id)
+            except Exception:
+                logger.exception("Suggestion prefetch error for %d", telegram_id)
+            finally:
+                self._requests.task_done()
+
+    async def _generate(
+        self,
+        solved_stats: list[dict],
+        skill_stats: dict,
+        pending_slugs: list[str],
+        completed_slugs: list[str],
+        progress: Progress | None = None,
+    ) -> Suggestion | str:
+        if settings.suggest_mode == "gpt" and self.gpt is not None:
+            return await self._gpt_tasks(
+                solved_stats, skill_stats, completed_slugs, pending_slugs, progress
+            )
+
+        # Local picks come straight from the catalog, so they need no validation.
+        tasks = self.recommender.suggest(
+            solved_stats, skill_stats, {*completed_slugs, *pending_slugs}, TASK_COUNT
+        )
+        if not tasks:
+            return "Couldn't generate task suggestions right now. Please try again later."
+        analysis = await self._local_analysis(solved_stats, skill_stats, tasks)
+        return Suggestion(analysis, tasks)
+
+    async def _gpt_tasks(
+        self,
+        solved_stats: list[dict],
+        skill_stats: dict,
+        completed_slugs: list[str],
+        pending_slugs: list[str],
+        progress: Progress | None,
+    ) -> Suggestion | str:
+        """Let GPT rank a surplus of candidates and keep the first valid ones.
+
+        Every candidate's catalog lookup starts as soon as the model finishes
+        writing it, so invalid or duplicate picks fall through to the next in
+        rank order without another request. Once the top `TASK_COUNT` valid
+        picks are settled, the rest of the stream is dropped.
+        """
+        args = (solved_stats, skill_stats, completed_slugs, pending_slugs)
+        count = max(settings.gpt_candidate_count, TASK_COUNT)
+        if settings.gpt_streaming:
+            events = self.gpt.stream_tasks(*args, count=count)
+        else:
+            events = _events(await self.gpt.suggest_tasks(*args, count=count))
+
+        # The prompt lists only recent history; the full exclusion is enforced here.
+        assigned = {*completed_slugs, *pending_slugs}
+        seen: set[str] = set()
+        analysis = ""
+        candidates: list[tuple[dict, asyncio.Task[dict | None]]] = []
+        picks: list[dict] = []
+        settled = 0
+
+        def settle() -> None:
+            """Accept or reject resolved candidates, in rank order."""
+            nonlocal settled
+            while len(picks) < TASK_COUNT and settled < len(candidates):
+                task, lookup = candidates[settled]
+                if not lookup.done():
+                    return
+                settled += 1
+                try:
+                    problem = lookup.result()
+                except Exception:
+                    # E.g. an open breaker for an unseen slug: try the next rank.
+                    logger.warning(
+                        "Catalog lookup failed for %s", task.get("titleSlug"), exc_info=True
+                    )
+                    REJECTED.inc("error")
+                    continue
+                if problem:
+                    picks.append(_validated(task, problem))
+                else:
+                    REJECTED.inc("invalid")
+
+        try:
+            async with aclosing(events):
+                async for kind, value in events:
+                    if kind == "analysis":
+                        analysis = value
+                    elif isinstance(value, dict):
+                        slug = value.get("titleSlug", "")
+                        if slug in assigned or slug in seen:
+                            REJECTED.inc("assigned" if slug in assigned else "duplicate")
+                            continue
+                        seen.add(slug)
+                        lookup = asyncio.create_task(self.catalog.get(slug))
+                        candidates.append((value, lookup))
+                    else:
+                        continue
+                    settle()
+                    if analysis and len(picks) == TASK_COUNT:
+                        break
+                    if progress is not None:
+                        unsettled = [task for task, _ in candidates[settled:]]
+                        progress(analysis, (picks + unsettled)[:TASK_COUNT])
+
+            settle()
+            while len(picks) < TASK_COUNT and settled < len(candidates):
+                await asyncio.wait([candidates[settled][1]])
+                settle()
+        finally:
+            for _, lookup in candidates:
+                lookup.cancel()
+
+        if not candidates:
+            return "Couldn't generate task suggestions right now. Please try again later."
+        if not picks:
+            return "Couldn't validate suggested problems. Please try again."
+        return Suggestion(analysis, picks)
+
+    async def _local_analysis(
+        self, solved_stats: list[dict], skill_stats: dict, tasks: list[dict]
+    ) -> str:
+        """GPT-written analysis in hybrid mode, else (or on failure) a template."""
+        if settings.suggest_mode == "hybrid" and self.gpt is not None:
+            try:
+                analysis = await self.gpt.write_analysis(solved_stats, skill_stats, tasks)
+                if analysis:
+                    return analysis
+            except Exception:
+                logger.exception("GPT analysis failed, using local analysis")
+        return local_analysis(self.recommender.weak_tags(skill_stats))
+
+
+def _validated(task: dict, problem: dict) -> dict:
+    """A GPT pick with difficulty and category taken from the catalog."""
+    tags = problem.get("topicTags", [])
+    return {
+        "titleSlug": problem["titleSlug"],
+        "difficulty": problem.get("difficulty", task.get("difficulty", "Medium")),
+        "category": tags[0]["name"] if tags else task.get("category", "General"),
+    }
+
+
+async def _events(result: dict[str, Any]) -> AsyncIterator[tuple[str, Any]]:
+    """A complete (non-streamed) GPT result as `stream_tasks` events."""
+    yield "analysis", result.get("analysis", "")
+    for task in result.get("tasks", []):
+        yield "task", task
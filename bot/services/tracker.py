@@ -2,68 +2,300 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
 
-from aiogram import Bot
-
-from bot.achievements.definitions import check_achievements
+from bot import metrics
+from bot.achievements.definitions import check_achievements, forget_unlocked
 from bot.config import settings
-from bot.db.repository import Repository
+from bot.db.repository import Repository, TrackedUser
+from bot.services.leases import LeaseManager
 from bot.services.leetcode import LeetCodeClient
+from bot.services.notifier import Notifier
+from bot.services.scheduler import PollScheduler
+from bot.services.suggestions import SuggestionService
 
 logger = logging.getLogger(__name__)
 
+BATCH_SECONDS = metrics.Histogram(
+    "bot_tracker_batch_seconds",
+    "Time to fetch and process one batch of due users.",
+)
+USERS_CHECKED = metrics.Counter(
+    "bot_tracker_users_checked",
+    "Users whose recent submissions were fetched.",
+)
+SCHEDULED = metrics.Gauge(
+    "bot_tracker_scheduled_users",
+    "Users in this tracker's poll schedule.",
+)
+LAG = metrics.Gauge(
+    "bot_tracker_lag_seconds",
+    "How far behind its due time the most overdue scheduled user is.",
+)
+PARTITIONS = metrics.Gauge(
+    "bot_tracker_partitions_owned",
+    "Tracker partitions leased by this process.",
+)
+
+
+async def run_tracker(
+    notifier: Notifier,
+    repo: Repository,
+    leetcode: LeetCodeClient,
+    leases: LeaseManager,
+    scheduler: PollScheduler,
+    suggestions: SuggestionService | None = None,
+) -> None:
+    """Background task that polls LeetCode for completed assigned tasks.
+
+    Users in partitions held by `leases` are polled as their due times come
+    up in `scheduler`, so requests go out at a steady rate rather than in
+    periodic bursts. Newly assigned users are pushed to the scheduler when
+    they are assigned in this process, and picked up from the database every
+    `tracker_resync_seconds` otherwise.
+    """
+    logger.info(
+        "Tracker %s started (interval: %ds)",
+        leases.owner,
+        settings.tracker_interval_seconds,
+    )
+    PARTITIONS.set_function(lambda: len(leases.owned))
+    SCHEDULED.set_function(lambda: len(scheduler))
+    LAG.set_function(lambda: max(0.0, time.time() - (scheduler.next_due() or time.time())))
+    await leases.start()
+    lease_task = asyncio.create_task(leases.run())
+    resync_at = 0.0
+    # Throughput, logged about once per tracker interval.
+    report_started = time.monotonic()
+    checked = 0
+    try:
+        while True:
+            if not leases.valid():
+                # No partitions yet: retry once the next rebalance has run.
+                await asyncio.sleep(leases.ttl / 3)
+                continue
+            # Trackers split Telegram's per-bot limit by partitions held.
+            notifier.set_rate(settings.telegram_messages_per_second * leases.share())
+            try:
+                if leases.owned != scheduler.partitions:
+                    gained = scheduler.set_partitions(leases.owned)
+                    loaded = await scheduler.load(
+                        repo, gained, spread=settings.tracker_interval_seconds
+                    )
+                    logger.info("Scheduled %d users from %d new partitions", loaded, len(gained))
+                    resync_at = time.time() + settings.tracker_resync_seconds
+                elif time.time() >= resync_at:
+                    await scheduler.load(
+                        repo, scheduler.partitions, spread=0.0, unscheduled_only=True
+                    )
+                    resync_at = time.time() + settings.tracker_resync_seconds
+                checked += await _poll_due(
+                    notifier, repo, leetcode, leases, scheduler, suggestions
+                )
+            except Exception:
+                logger.exception("Tracker poll error")
+
+            elapsed = time.monotonic() - report_started
+            if elapsed >= settings.tracker_interval_seconds:
+                logger.info(
+                    "Checked %d users in %.1fs (%.2f users/s), %d scheduled",
+                    checked,
+                    elapsed,
+                    checked / elapsed,
+                    len(scheduler),
+                )
+                report_started = time.monotonic()
+                checked = 0
+
+            wake_at = min(resync_at, scheduler.next_due() or resync_at)
+            await scheduler.wait(min(wake_at - time.time(), leases.ttl / 3))
+    finally:
+        lease_task.cancel()
+        await leases.release()
+
+
+async def _poll_due(
+    notifier: Notifier,
+    repo: Repository,
+    leetcode: LeetCodeClient,
+    leases: LeaseManager,
+    scheduler: PollScheduler,
+    suggestions: SuggestionService | None = None,
+) -> int:
+    """Poll every user that is due, in batches, with a bounded worker pool.
+
+    Users due within `tracker_batch_window_seconds` are pulled in early so
+    batches stay full. Pacing comes from the client's shared rate limiter.
+    Returns how many users were checked.
+    """
+    checked = 0
+
+    async def worker() -> None:
+        nonlocal checked
+        while leases.valid():
+            if not scheduler.partitions <= leases.owned:
+                # A rebalance released partitions another tracker may already
+                # poll: drop their users now rather than after this sweep.
+                scheduler.set_partitions(scheduler.partitions & leases.owned)
+            popped = scheduler.pop_due(
+                time.time() + settings.tracker_batch_window_seconds,
+                settings.tracker_batch_size,
+            )
+            if not popped:
+                return
+            user_ids = [user_id for user_id in popped if leases.owns(user_id)]
+            if not user_ids:
+                continue
+            try:
+                with BATCH_SECONDS.time():
+                    checked += await _poll_batch(
+                        notifier, repo, leetcode, scheduler, suggestions, user_ids
+                    )
+            except Exception:
+                # Popped users must not fall out of the schedule on a failure
+                # (e.g. a locked database): retry whoever wasn't rescheduled.
+                logger.exception("Error polling %d tracked users", len(user_ids))
+                _reschedule_missing(scheduler, user_ids)
+
+    async with asyncio.TaskGroup() as tg:
+        for _ in range(settings.tracker_concurrency):
+            tg.create_task(worker())
+    return checked
+
+
+def _reschedule_missing(scheduler: PollScheduler, user_ids: list[int]) -> None:
+    retry_at = time.time() + settings.tracker_interval_seconds
+    for user_id in user_ids:
+        if user_id not in scheduler:
+            scheduler.schedule(user_id, retry_at)
+
 
-async def run_tracker(bot: Bot, repo: Repository, leetcode: LeetCodeClient) -> None:
-    """Background task that polls LeetCode for completed assigned tasks."""
-    logger.info("Tracker started (interval: %ds)", settings.tracker_interval_seconds)
-    while True:
-        try:
-            await _poll_completions(bot, repo, leetcode)
-        except Exception:
-            logger.exception("Tracker poll error")
-        await asyncio.sleep(settings.tracker_interval_seconds)
+async def _poll_batch(
+    notifier: Notifier,
+    repo: Repository,
+    leetcode: LeetCodeClient,
+    scheduler: PollScheduler,
+    suggestions: SuggestionService | None,
+    user_ids: list[int],
+) -> int:
+    """Check the given due users; returns how many were checked."""
+    try:
+        # Users who no longer have pending tasks drop out of the schedule here.
+        users = await repo.get_tracked_users(user_ids)
+    except Exception:
+        logger.exception("Error loading %d tracked users", len(user_ids))
+        retry_at = time.time() + settings.tracker_interval_seconds
+        for user_id in user_ids:
+            scheduler.schedule(user_id, retry_at)
+        return 0
+    if users:
+        await _check_batch(notifier, repo, leetcode, scheduler, suggestions, users)
+        USERS_CHECKED.inc(amount=len(users))
+    return len(users)
 
 
-async def _poll_completions(
-    bot: Bot, repo: Repository, leetcode: LeetCodeClient
+async def _check_batch(
+    notifier: Notifier,
+    repo: Repository,
+    leetcode: LeetCodeClient,
+    scheduler: PollScheduler,
+    suggestions: SuggestionService | None,
+    users: list[TrackedUser],
 ) -> None:
-    users = await repo.get_all_users_with_pending_tasks()
+    now = int(time.time())
+    retry_at = now + settings.tracker_interval_seconds
+    try:
+        recent_by_user = await leetcode.get_recent_submissions_many(
+            [u.leetcode_username for u in users], limit=30
+        )
+    except Exception:
+        logger.exception("Error fetching submissions for %d users", len(users))
+        for user in users:
+            scheduler.schedule(user.id, retry_at)
+        return
+
+    states: list[tuple[int, int | None, int, int, int]] = []
+    finished: list[int] = []
     for user in users:
-        try:
-            await _check_user(bot, repo, leetcode, user)
-        except Exception:
-            logger.exception("Error checking user %s", user["leetcode_username"])
-        await asyncio.sleep(2)  # rate-limit between users
+        recent = recent_by_user.get(user.leetcode_username)
+        if recent is None:
+            scheduler.schedule(user.id, retry_at)
+            continue
+        watermark = user.watermark
+        newest = max((int(sub["timestamp"]) for sub in recent), default=None)
+        if newest is not None and (watermark is None or newest > watermark):
+            try:
+                if not await _check_user(notifier, repo, suggestions, user, recent):
+                    finished.append(user.id)
+            except Exception:
+                logger.exception("Error checking user %s", user.leetcode_username)
+                scheduler.schedule(user.id, retry_at)
+                continue
+            watermark = newest
+            interval = settings.tracker_interval_seconds
+        else:
+            # Nothing new since the last poll: back off exponentially.
+            interval = min(
+                2 * (user.poll_interval or settings.tracker_interval_seconds),
+                settings.tracker_max_interval_seconds,
+            )
+        states.append((user.id, watermark, interval, now + interval, user.epoch))
+
+    reset = await repo.save_tracker_states(states)
+    for user_id, _, _, next_poll_at, _ in states:
+        # Tasks assigned mid-poll reset the state: check those users again now.
+        scheduler.schedule(user_id, now if user_id in reset else next_poll_at)
+    # Everything they had is done: nothing to poll until new tasks arrive.
+    for user_id in finished:
+        if user_id not in reset:
+            scheduler.remove(user_id)
 
 
 async def _check_user(
-    bot: Bot, repo: Repository, leetcode: LeetCodeClient, user: dict
-) -> None:
-    recent = await leetcode.get_recent_submissions(user["leetcode_username"], limit=30)
+    notifier: Notifier,
+    repo: Repository,
+    suggestions: SuggestionService | None,
+    user: TrackedUser,
+    recent: list[dict],
+) -> bool:
+    """Complete pending tasks found in `recent`; returns whether any remain."""
     recent_slugs = {sub["titleSlug"] for sub in recent}
 
-    pending = await repo.get_pending_tasks(user["id"])
-    for task in pending:
-        if task["leetcode_slug"] in recent_slugs:
-            await repo.complete_task(task["id"])
-            logger.info(
-                "User %s completed %s",
-                user["leetcode_username"],
-                task["leetcode_slug"],
-            )
-
-            await bot.send_message(
-                user["telegram_id"],
-                f"Congrats! You completed **{task['leetcode_slug']}** "
-                f"[{task['difficulty']}] 🎉",
-                parse_mode="Markdown",
-            )
+    pending = await repo.get_pending_tasks(user.id)
+    completed = [t for t in pending if t["leetcode_slug"] in recent_slugs]
+    if not completed:
+        return bool(pending)
 
-            new_achievements = await check_achievements(repo, user["id"])
-            for ach in new_achievements:
-                await bot.send_message(
-                    user["telegram_id"],
-                    f"🏆 Achievement Unlocked: **{ach['name']}**\n"
-                    f"_{ach['description']}_",
-                    parse_mode="Markdown",
+    # One commit for all completions and unlocks; notify only once it landed.
+    messages: list[str] = []
+    try:
+        async with repo.transaction():
+            for task in completed:
+                await repo.complete_task(task["id"])
+                logger.info(
+                    "User %s completed %s",
+                    user.leetcode_username,
+                    task["leetcode_slug"],
                 )
+                messages.append(
+                    f"Congrats! You completed **{task['leetcode_slug']}** "
+                    f"[{task['difficulty']}] 🎉"
+                )
+
+                new_achievements = await check_achievements(repo, user.id, task)
+                for ach in new_achievements:
+                    messages.append(
+                        f"🏆 Achievement Unlocked: **{ach['name']}**\n"
+                        f"_{ach['description']}_"
+                    )
+    except BaseException:
+        # The unlocks rolled back with it: don't let the cache claim them.
+        forget_unlocked(user.id)
+        raise
+
+    for text in messages:
+        notifier.send(user.telegram_id, text)
+    # Completions invalidated their queued batch; pick the next one now.
+    if suggestions is not None:
+        suggestions.request(user.telegram_id)
+    return len(completed) < len(pending)
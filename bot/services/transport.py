@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator
+
+import aiohttp
+
+from bot import metrics
+from bot.services.ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+RETRIES = metrics.Counter(
+    "bot_http_retries",
+    "Retried upstream HTTP attempts, by target and reason.",
+    ("target", "reason"),
+)
+CIRCUIT_OPEN = metrics.Gauge(
+    "bot_http_circuit_open",
+    "1 while the target's circuit breaker rejects requests.",
+    ("target",),
+)
+CONCURRENCY_LIMIT = metrics.Gauge(
+    "bot_http_concurrency_limit",
+    "Current adaptive (AIMD) concurrency limit per target.",
+    ("target",),
+)
+RATE_LIMIT_WAIT_SECONDS = metrics.Histogram(
+    "bot_http_rate_limit_wait_seconds",
+    "Time spent waiting for the target's rate limiter.",
+    ("target",),
+)
+
+
+class CircuitOpenError(Exception):
+    """The target failed repeatedly; requests are rejected until it recovers."""
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures, for `reset_timeout` seconds.
+
+    Once the timeout passes a single probe request is let through (half-open);
+    its outcome closes the circuit or opens it again.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float) -> None:
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        if self._probing or time.monotonic() - self._opened_at < self.reset_timeout:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("Circuit closed after successful probe")
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or (self._opened_at is None and self.failures >= self.threshold):
+            logger.warning("Circuit opened after %d failures", self.failures)
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+    def abandon(self) -> None:
+        """The probe ended without an outcome (e.g. cancelled); allow another."""
+        self._probing = False
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on in-flight requests.
+
+    Each success raises the limit by `1 / limit` (about +1 per window of
+    requests); an overload signal multiplies it by `backoff`, at most once
+    per `cooldown` seconds so one burst of 429s counts as one signal.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = 64,
+        backoff: float = 0.5,
+        cooldown: float = 1.0,
+    ) -> None:
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._decreased_at = 0.0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self._acquire()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._wake()
+
+    def on_success(self) -> None:
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        self._wake()
+
+    def on_overload(self) -> None:
+        now = time.monotonic()
+        if now - self._decreased_at < self.cooldown:
+            return
+        self._decreased_at = now
+        self.limit = max(self.minimum, self.limit * self.backoff)
+
+    async def _acquire(self) -> None:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as we were cancelled: hand the slot on.
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+class Transport:
+    """JSON-over-HTTP POSTs with deadlines, retries and overload control.
+
+    Every attempt takes an adaptive concurrency slot and a rate limiter token.
+    Idempotent requests are retried on 429, 5xx, timeouts and connection
+    errors with full-jitter exponential backoff, within an overall deadline.
+    A 429's `Retry-After` pauses every request to the target, not just the
+    one that got it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        rate_limiter: TokenBucket | None = None,
+        concurrency: AdaptiveConcurrency,
+        breaker: CircuitBreaker,
+        timeout: float,
+        deadline: float,
+        max_attempts: int,
+        backoff_base: float,
+        backoff_max: float,
+    ) -> None:
+        self.name = name
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.breaker = breaker
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._resume_at = 0.0
+        CIRCUIT_OPEN.set_function(lambda: float(breaker.is_open), name)
+        CONCURRENCY_LIMIT.set_function(lambda: concurrency.limit, name)
+
+    async def post_json(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        payload: Any,
+        idempotent: bool = True,
+    ) -> Any:
+        deadline = time.monotonic() + self.deadline
+        attempts = self.max_attempts if idempotent else 1
+        for attempt in range(1, attempts + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name}: circuit open")
+            try:
+                return await self._attempt(session, url, payload, deadline)
+            except aiohttp.ClientResponseError as e:
+                if e.status == 429:
+                    reason = "throttled"
+                    delay = _retry_after(e.headers) or self._backoff(attempt)
+                elif e.status >= 500:
+                    reason, delay = "server_error", self._backoff(attempt)
+                else:
+                    raise
+                error: Exception = e
+            except asyncio.TimeoutError as e:
+                reason, delay, error = "timeout", self._backoff(attempt), e
+            except aiohttp.ClientError as e:
+                reason, delay, error = "connection", self._backoff(attempt), e
+
+            if attempt == attempts or time.monotonic() + delay >= deadline:
+                raise error
+            RETRIES.inc(self.name, reason)
+            logger.warning(
+                "%s request failed (%s), retry %d in %.1fs",
+                self.name, reason, attempt, delay,
+            )
+            await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    async def _attempt(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        payload: Any,
+        deadline: float,
+    ) -> Any:
+        recorded = False
+        try:
+            async with self.concurrency.slot():
+                pause = self._resume_at - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                if self.rate_limiter is not None:
+                    with RATE_LIMIT_WAIT_SECONDS.time(self.name):
+                        await self.rate_limiter.acquire()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(f"{self.name}: deadline exceeded")
+                try:
+                    async with session.post(
+                        url,
+                        json=payload,
+                        timeout=aiohttp.ClientTimeout(total=min(self.timeout, remaining)),
+                    ) as resp:
+                        if resp.status == 429:
+                            self._resume_at = max(
+                                self._resume_at,
+                                time.monotonic() + (_retry_after(resp.headers) or 0.0),
+                            )
+                        resp.raise_for_status()
+                        body = await resp.json()
+                except aiohttp.ClientResponseError as e:
+                    # Throttling and client errors still prove the target is up.
+                    if e.status >= 500:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    recorded = True
+                    if e.status == 429 or e.status >= 500:
+                        self.concurrency.on_overload()
+                    raise
+                except (asyncio.TimeoutError, aiohttp.ClientError):
+                    self.breaker.record_failure()
+                    recorded = True
+                    self.concurrency.on_overload()
+                    raise
+                self.breaker.record_success()
+                recorded = True
+                self.concurrency.on_success()
+                return body
+        finally:
+            if not recorded:
+                self.breaker.abandon()
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+
+def _retry_after(headers: Any) -> float | None:
+    """Seconds from a `Retry-After` header (delta-seconds or HTTP date)."""
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,102 @@
+"""Standalone completion tracker: `python -m bot.tracker`.
+
+Start any number of these next to a bot running with
+`TRACKER_EMBEDDED=false`; they split users between them through partition
+leases in the shared database. Each one also refills the suggestion queue
+for users who complete tasks, so the bot can serve their next /tasks from it.
+"""
+
+import asyncio
+import logging
+
+from aiogram import Bot
+
+from bot import metrics
+from bot.config import settings
+from bot.db.models import connect_reader, init_db
+from bot.db.pool import ReadPool
+from bot.db.repository import Repository
+from bot.services.catalog import ProblemCatalog
+from bot.services.gpt import GPTService
+from bot.services.leases import LeaseManager
+from bot.services.leetcode import LeetCodeClient
+from bot.services.notifier import Notifier
+from bot.services.ratelimit import TokenBucket
+from bot.services.recommender import Recommender
+from bot.services.scheduler import PollScheduler
+from bot.services.suggestions import SuggestionService
+from bot.services.tracker import run_tracker
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    metrics_runner = None
+    if settings.metrics_port:
+        metrics_runner = await metrics.start_server(
+            settings.metrics_host, settings.metrics_port
+        )
+    db = await init_db(settings.database_path)
+    readers = None
+    if settings.db_read_pool_size > 0:
+        readers = await ReadPool.open(
+            settings.db_read_pool_size, lambda: connect_reader(settings.database_path)
+        )
+    repo = Repository(
+        db,
+        group_commit_window=settings.db_group_commit_ms / 1000,
+        readers=readers,
+    )
+    leetcode = LeetCodeClient(
+        rate_limiter=TokenBucket(settings.leetcode_requests_per_second)
+    )
+    catalog = ProblemCatalog(repo, leetcode)
+    await catalog.load()
+    gpt = GPTService() if settings.suggest_mode != "local" else None
+    suggestions = SuggestionService(repo, leetcode, catalog, gpt, Recommender(catalog))
+    bot = Bot(token=settings.telegram_bot_token)
+    notifier = Notifier(
+        bot,
+        messages_per_second=settings.telegram_messages_per_second,
+        chat_interval=settings.telegram_chat_interval_seconds,
+        coalesce_window=settings.notify_coalesce_seconds,
+    )
+    leases = LeaseManager(
+        repo, settings.tracker_partitions, settings.tracker_lease_seconds
+    )
+
+    notifier.start()
+    catalog_task = asyncio.create_task(catalog.run_refresh())
+    # Refills after completions only; the bot refreshes stale batches.
+    prefetch_task = asyncio.create_task(suggestions.run(refresh_stale=False))
+    try:
+        await run_tracker(
+            notifier,
+            repo,
+            leetcode,
+            leases,
+            PollScheduler(settings.tracker_partitions),
+            suggestions,
+        )
+    finally:
+        catalog_task.cancel()
+        prefetch_task.cancel()
+        await asyncio.gather(prefetch_task, return_exceptions=True)
+        await notifier.close(settings.notify_flush_timeout_seconds)
+        await leetcode.close()
+        await bot.session.close()
+        await repo.flush()
+        if readers is not None:
+            await readers.close()
+        await db.close()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        logger.info("Tracker stopped.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
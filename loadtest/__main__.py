@@ -0,0 +1,87 @@
+"""Offline load test against local fake LeetCode, OpenAI and Telegram servers.
+
+    python -m loadtest --users 2000 --concurrency 200 --leetcode-latency-ms 80
+
+Drives every simulated user through /start, /tasks and /progress via the real
+dispatcher, then runs full tracker sweeps, and reports throughput and
+p50/p95/p99 latency per scenario.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+
+# bot.config requires these at import; the fakes accept any value.
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:loadtest")
+os.environ.setdefault("OPENAI_API_KEY", "loadtest")
+
+from loadtest.fakes import Faults  # noqa: E402
+from loadtest.runner import LoadTest, format_report  # noqa: E402
+
+SERVICES = ("leetcode", "openai", "telegram")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m loadtest")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--sweeps", type=int, default=3)
+    parser.add_argument("--catalog-size", type=int, default=50)
+    parser.add_argument("--solves-per-poll", type=int, default=3)
+    parser.add_argument("--leetcode-rps", type=float, default=500.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--suggest-mode", choices=("gpt", "local", "hybrid"), default="gpt"
+    )
+    parser.add_argument(
+        "--no-prefetch", dest="prefetch", action="store_false",
+        help="generate every suggestion on demand",
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    for service in SERVICES:
+        group = parser.add_argument_group(f"{service} faults")
+        group.add_argument(f"--{service}-latency-ms", type=float, default=20.0)
+        group.add_argument(f"--{service}-jitter-ms", type=float, default=10.0)
+        group.add_argument(f"--{service}-error-rate", type=float, default=0.0)
+        group.add_argument(f"--{service}-throttle-rate", type=float, default=0.0)
+        group.add_argument(f"--{service}-retry-after", type=int, default=1)
+    return parser.parse_args()
+
+
+def faults(args: argparse.Namespace, service: str) -> Faults:
+    return Faults(
+        latency=getattr(args, f"{service}_latency_ms") / 1000,
+        jitter=getattr(args, f"{service}_jitter_ms") / 1000,
+        error_rate=getattr(args, f"{service}_error_rate"),
+        throttle_rate=getattr(args, f"{service}_throttle_rate"),
+        retry_after=getattr(args, f"{service}_retry_after"),
+    )
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.CRITICAL,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    load_test = LoadTest(
+        users=args.users,
+        concurrency=args.concurrency,
+        sweeps=args.sweeps,
+        catalog_size=args.catalog_size,
+        solves_per_poll=args.solves_per_poll,
+        leetcode_rps=args.leetcode_rps,
+        seed=args.seed,
+        suggest_mode=args.suggest_mode,
+        prefetch=args.prefetch,
+        **{service: faults(args, service) for service in SERVICES},
+    )
+    report = asyncio.run(load_test.run())
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
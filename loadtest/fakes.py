@@ -0,0 +1,360 @@
+"""Local stand-ins for LeetCode GraphQL, OpenAI and the Telegram Bot API.
+
+Each fake is an aiohttp app on an ephemeral port with its own `Faults`:
+added latency, a share of 5xx errors and a share of 429 responses that
+carry the service's usual Retry-After hint.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any
+
+from aiohttp import web
+
+TOPICS = (
+    "Array", "String", "Hash Table", "Dynamic Programming", "Math", "Sorting",
+    "Greedy", "Tree", "Graph", "Binary Search", "Linked List", "Stack",
+)
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+
+_OPERATION_RE = re.compile(r"^\s*(?:query|mutation)\s+(\w+)")
+_PROFILE_OPERATIONS = {
+    "getUserProfile",
+    "userProblemsSolved",
+    "skillStats",
+    "userProfileStats",
+}
+
+
+@dataclass(slots=True)
+class Faults:
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: int = 1
+
+
+def make_problems(count: int) -> list[dict]:
+    return [
+        {
+            "titleSlug": f"problem-{i}",
+            "title": f"Problem {i}",
+            "difficulty": DIFFICULTIES[i % len(DIFFICULTIES)],
+            "paidOnly": i % 7 == 0,
+            "topicTags": [{"name": TOPICS[i % len(TOPICS)]}],
+        }
+        for i in range(count)
+    ]
+
+
+class FakeServer:
+    name = "fake"
+
+    def __init__(self, faults: Faults, seed: int = 0) -> None:
+        self.faults = faults
+        self.stats: Counter[str] = Counter()
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+    def routes(self) -> list[web.RouteDef]:
+        raise NotImplementedError
+
+    async def start(self) -> str:
+        app = web.Application(middlewares=[self._inject_faults])
+        app.add_routes(self.routes())
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def throttled(self) -> web.Response:
+        return web.json_response(
+            {"error": "rate limited"},
+            status=429,
+            headers={"Retry-After": str(self.faults.retry_after)},
+        )
+
+    def failed(self) -> web.Response:
+        return web.json_response({"error": "injected failure"}, status=500)
+
+    @web.middleware
+    async def _inject_faults(self, request: web.Request, handler: Any) -> web.StreamResponse:
+        self.stats["requests"] += 1
+        faults = self.faults
+        delay = faults.latency + self._random.uniform(0, faults.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        roll = self._random.random()
+        if roll < faults.throttle_rate:
+            self.stats["throttled"] += 1
+            return self.throttled()
+        if roll < faults.throttle_rate + faults.error_rate:
+            self.stats["errors"] += 1
+            return self.failed()
+        return await handler(request)
+
+
+class FakeLeetCode(FakeServer):
+    """Answers every GraphQL operation `LeetCodeClient` sends.
+
+    Each user "solves" a few random catalog problems between polls, with
+    timestamps that only move forward, so tracker sweeps see new activity.
+    """
+
+    name = "leetcode"
+
+    def __init__(
+        self,
+        faults: Faults,
+        problems: list[dict],
+        solves_per_poll: int = 3,
+        seed: int = 0,
+    ) -> None:
+        super().__init__(faults, seed)
+        self.problems = problems
+        self.solves_per_poll = solves_per_poll
+        self._by_slug = {p["titleSlug"]: p for p in problems}
+        self._clock = itertools.count(int(time.time()))
+
+    def routes(self) -> list[web.RouteDef]:
+        return [web.post("/graphql", self.graphql), web.post("/graphql/", self.graphql)]
+
+    async def graphql(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        variables = payload.get("variables") or {}
+        match = _OPERATION_RE.match(payload["query"])
+        operation = match.group(1) if match else ""
+        self.stats[operation] += 1
+
+        if operation == "recentAcSubmissionsBatch":
+            data = {
+                alias: self._recent(variables["limit"])
+                for alias in variables
+                if alias != "limit"
+            }
+        elif operation == "recentAcSubmissions":
+            data = {"recentAcSubmissionList": self._recent(variables["limit"])}
+        elif operation in _PROFILE_OPERATIONS:
+            data = {"matchedUser": self._profile(variables["username"])}
+        elif operation == "getQuestion":
+            data = {"question": self._by_slug.get(variables["titleSlug"])}
+        elif operation == "problemsetQuestionList":
+            skip, limit = variables.get("skip", 0), variables.get("limit", 100)
+            data = {
+                "problemsetQuestionList": {
+                    "total": len(self.problems),
+                    "questions": self.problems[skip : skip + limit],
+                }
+            }
+        else:
+            return web.json_response({"errors": [{"message": f"unknown {operation}"}]})
+        return web.json_response({"data": data})
+
+    def _recent(self, limit: int) -> list[dict]:
+        picks = self._random.sample(self.problems, min(self.solves_per_poll, limit))
+        return [
+            {
+                "titleSlug": p["titleSlug"],
+                "title": p["title"],
+                "timestamp": str(next(self._clock)),
+            }
+            for p in picks
+        ]
+
+    def _profile(self, username: str) -> dict:
+        counts = [
+            {"difficulty": d, "count": self._random.randint(0, 200)}
+            for d in DIFFICULTIES
+        ]
+        total = sum(c["count"] for c in counts)
+        counts.insert(0, {"difficulty": "All", "count": total})
+        tags = [
+            {"tagName": topic, "problemsSolved": self._random.randint(0, 50)}
+            for topic in TOPICS
+        ]
+        return {
+            "username": username,
+            "submitStatsGlobal": {"acSubmissionNum": counts},
+            "tagProblemCounts": {
+                "advanced": tags[:4],
+                "intermediate": tags[4:8],
+                "fundamental": tags[8:],
+            },
+        }
+
+
+class FakeOpenAI(FakeServer):
+    """Chat completions that suggest random catalog problems as JSON."""
+
+    name = "openai"
+
+    # Streamed completions arrive a few characters every few milliseconds.
+    chunk_size = 16
+    chunk_interval = 0.005
+
+    def __init__(self, faults: Faults, problems: list[dict], seed: int = 0) -> None:
+        super().__init__(faults, seed)
+        self.problems = problems
+
+    def routes(self) -> list[web.RouteDef]:
+        return [web.post("/v1/chat/completions", self.completions)]
+
+    def failed(self) -> web.Response:
+        return web.json_response(
+            {"error": {"message": "injected failure", "type": "server_error"}}, status=500
+        )
+
+    def throttled(self) -> web.Response:
+        return web.json_response(
+            {"error": {"message": "Rate limit reached", "type": "requests"}},
+            status=429,
+            headers={"Retry-After": str(self.faults.retry_after)},
+        )
+
+    async def completions(self, request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        asked = re.search(r"exactly (\d+)", payload["messages"][-1]["content"])
+        count = int(asked.group(1)) if asked else 3
+        picks = self._random.sample(self.problems, min(count, len(self.problems)))
+        content = json.dumps(
+            {
+                "analysis": "Load test analysis.",
+                "tasks": [
+                    {
+                        "titleSlug": p["titleSlug"],
+                        "difficulty": p["difficulty"],
+                        "category": p["topicTags"][0]["name"],
+                    }
+                    for p in picks
+                ],
+            }
+        )
+        prompt_tokens = sum(len(m.get("content") or "") for m in payload["messages"]) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_tokens + len(content) // 4,
+        }
+        if payload.get("stream"):
+            return await self._stream(request, payload, content, usage)
+        return web.json_response(
+            {
+                "id": f"chatcmpl-{self.stats['requests']}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "fake"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            }
+        )
+
+    async def _stream(
+        self, request: web.Request, payload: dict, content: str, usage: dict
+    ) -> web.StreamResponse:
+        """Server-sent chunks of `content`, paced like a model writing tokens."""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        base = {
+            "id": f"chatcmpl-{self.stats['requests']}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake"),
+        }
+
+        async def send(chunk: dict) -> None:
+            await response.write(f"data: {json.dumps({**base, **chunk})}\n\n".encode())
+
+        for i in range(0, len(content), self.chunk_size):
+            await send(
+                {
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"content": content[i : i + self.chunk_size]},
+                            "finish_reason": None,
+                        }
+                    ]
+                }
+            )
+            await asyncio.sleep(self.chunk_interval)
+        await send({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            await send({"choices": [], "usage": usage})
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+
+class FakeTelegram(FakeServer):
+    """Bot API methods the handlers call, echoing back plausible objects."""
+
+    name = "telegram"
+
+    def __init__(self, faults: Faults, seed: int = 0) -> None:
+        super().__init__(faults, seed)
+        self._message_ids = itertools.count(1)
+
+    def routes(self) -> list[web.RouteDef]:
+        return [web.post("/bot{token}/{method}", self.method)]
+
+    def failed(self) -> web.Response:
+        return web.json_response(
+            {"ok": False, "error_code": 500, "description": "Internal Server Error"},
+            status=500,
+        )
+
+    def throttled(self) -> web.Response:
+        retry_after = self.faults.retry_after
+        return web.json_response(
+            {
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after},
+            },
+            status=429,
+        )
+
+    async def method(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.stats[method] += 1
+        form = await request.post()
+        if method in ("sendMessage", "editMessageText"):
+            chat_id = int(form["chat_id"])
+            message_id = (
+                int(form["message_id"]) if "message_id" in form else next(self._message_ids)
+            )
+            result: Any = {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": form.get("text", ""),
+            }
+        elif method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "Load Test Bot"}
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
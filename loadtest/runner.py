@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import math
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Update
+
+from bot.config import settings
+from bot.db.models import connect_reader, init_db
+from bot.db.pool import ReadPool
+from bot.db.repository import Repository
+from bot.dispatcher import create_dispatcher
+from bot.services import tracker
+from bot.services.catalog import ProblemCatalog
+from bot.services.gpt import GPTService
+from bot.services.leases import LeaseManager
+from bot.services.leetcode import LeetCodeClient
+from bot.services.notifier import Notifier
+from bot.services.ratelimit import TokenBucket
+from bot.services.recommender import Recommender
+from bot.services.scheduler import PollScheduler
+from bot.services.suggestions import SuggestionService
+from loadtest.fakes import FakeLeetCode, FakeOpenAI, FakeTelegram, Faults, make_problems
+
+logger = logging.getLogger(__name__)
+
+FIRST_USER_ID = 10_000_000
+
+
+@dataclass(slots=True)
+class Scenario:
+    name: str
+    latencies: list[float] = field(default_factory=list)
+    operations: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def summary(self) -> dict[str, Any]:
+        ordered = sorted(self.latencies)
+        return {
+            "name": self.name,
+            "operations": self.operations,
+            "errors": self.errors,
+            "throughput": self.operations / self.elapsed if self.elapsed else 0.0,
+            "p50_ms": percentile(ordered, 50) * 1000,
+            "p95_ms": percentile(ordered, 95) * 1000,
+            "p99_ms": percentile(ordered, 99) * 1000,
+            "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+        }
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+@dataclass(slots=True)
+class LoadTest:
+    users: int = 1000
+    concurrency: int = 100
+    sweeps: int = 3
+    catalog_size: int = 50
+    solves_per_poll: int = 3
+    # Lifted well above production so the fakes, not the limiter, set the pace.
+    leetcode_rps: float = 500.0
+    leetcode: Faults = field(default_factory=Faults)
+    openai: Faults = field(default_factory=Faults)
+    telegram: Faults = field(default_factory=Faults)
+    seed: int = 0
+    suggest_mode: str = "gpt"
+    prefetch: bool = True
+
+    async def run(self) -> dict[str, Any]:
+        problems = make_problems(self.catalog_size)
+        fakes = [
+            FakeLeetCode(self.leetcode, problems, self.solves_per_poll, self.seed),
+            FakeOpenAI(self.openai, problems, self.seed),
+            FakeTelegram(self.telegram, self.seed),
+        ]
+        for fake in fakes:
+            await fake.start()
+        fake_leetcode, fake_openai, fake_telegram = fakes
+        settings.leetcode_graphql_url = f"{fake_leetcode.url}/graphql"
+        settings.openai_base_url = f"{fake_openai.url}/v1"
+        settings.suggest_mode = self.suggest_mode
+        settings.suggest_prefetch = self.prefetch
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                scenarios = await self._run_bot(
+                    str(Path(tmp) / "loadtest.db"), fake_telegram.url
+                )
+        finally:
+            for fake in fakes:
+                await fake.close()
+
+        return {
+            "users": self.users,
+            "concurrency": self.concurrency,
+            "scenarios": [s.summary() for s in scenarios],
+            "services": {fake.name: dict(fake.stats) for fake in fakes},
+        }
+
+    async def _run_bot(self, db_path: str, telegram_url: str) -> list[Scenario]:
+        db = await init_db(db_path)
+        readers = None
+        if settings.db_read_pool_size > 0:
+            readers = await ReadPool.open(
+                settings.db_read_pool_size, lambda: connect_reader(db_path)
+            )
+        repo = Repository(
+            db,
+            group_commit_window=settings.db_group_commit_ms / 1000,
+            readers=readers,
+        )
+        leetcode = LeetCodeClient(rate_limiter=TokenBucket(self.leetcode_rps))
+        catalog = ProblemCatalog(repo, leetcode)
+        gpt = GPTService()
+        recommender = Recommender(catalog, seed=self.seed)
+        suggestions = SuggestionService(repo, leetcode, catalog, gpt, recommender)
+        bot = Bot(
+            token=settings.telegram_bot_token,
+            session=AiohttpSession(api=TelegramAPIServer.from_base(telegram_url)),
+        )
+        scheduler = PollScheduler(settings.tracker_partitions)
+        dp = create_dispatcher(
+            repo=repo,
+            leetcode=leetcode,
+            suggestions=suggestions,
+            scheduler=scheduler,
+        )
+        notifier = Notifier(
+            bot,
+            messages_per_second=settings.telegram_messages_per_second,
+            chat_interval=settings.telegram_chat_interval_seconds,
+            coalesce_window=settings.notify_coalesce_seconds,
+        )
+        update_ids = itertools.count(1)
+
+        async def feed(user_id: int, text: str) -> None:
+            update = Update.model_validate(
+                {
+                    "update_id": next(update_ids),
+                    "message": {
+                        "message_id": next(update_ids),
+                        "date": int(time.time()),
+                        "chat": {"id": user_id, "type": "private"},
+                        "from": {"id": user_id, "is_bot": False, "first_name": "Load"},
+                        "text": text,
+                    },
+                }
+            )
+            await dp.feed_update(bot, update)
+
+        notifier.start()
+        prefetch_task = asyncio.create_task(suggestions.run())
+        try:
+            # Steady state: the bot normally runs with a warm catalog.
+            await catalog.refresh()
+            start = Scenario("/start")
+            username = Scenario("username")
+
+            async def register(user_id: int) -> None:
+                await self._timed(start, feed(user_id, "/start"))
+                await self._timed(username, feed(user_id, f"user{user_id}"))
+
+            scenarios = [start, username]
+            await self._drive(register, start, username)
+            # Users come back after the prefetch has had its idle time.
+            if self.prefetch:
+                await suggestions.drain()
+            for command in ("/tasks", "/progress"):
+                scenario = Scenario(command)
+                await self._drive(
+                    lambda user_id: self._timed(scenario, feed(user_id, command)),
+                    scenario,
+                )
+                scenarios.append(scenario)
+            scenarios.append(
+                await self._sweep(notifier, repo, leetcode, scheduler, suggestions)
+            )
+            return scenarios
+        finally:
+            prefetch_task.cancel()
+            await asyncio.gather(prefetch_task, return_exceptions=True)
+            await notifier.close()
+            await leetcode.close()
+            await bot.session.close()
+            await repo.flush()
+            if readers is not None:
+                await readers.close()
+            await db.close()
+
+    async def _drive(
+        self, fn: Callable[[int], Awaitable[None]], *scenarios: Scenario
+    ) -> None:
+        """Run `fn` once per simulated user, `concurrency` at a time."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(user_id: int) -> None:
+            async with semaphore:
+                await fn(user_id)
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(one(FIRST_USER_ID + i) for i in range(self.users))
+        )
+        for scenario in scenarios:
+            scenario.elapsed = time.perf_counter() - started
+
+    async def _timed(self, scenario: Scenario, op: Awaitable[Any]) -> None:
+        started = time.perf_counter()
+        try:
+            await op
+        except Exception:
+            scenario.errors += 1
+            logger.debug("%s failed", scenario.name, exc_info=True)
+        scenario.latencies.append(time.perf_counter() - started)
+        scenario.operations += 1
+
+    async def _sweep(
+        self,
+        notifier: Notifier,
+        repo: Repository,
+        leetcode: LeetCodeClient,
+        scheduler: PollScheduler,
+        suggestions: SuggestionService,
+    ) -> Scenario:
+        """Time polls of every tracked user; throughput is users checked per second."""
+        scenario = Scenario("tracker sweep")
+        leases = LeaseManager(repo, settings.tracker_partitions, ttl=3600.0)
+        await leases.start()
+        checked = tracker.USERS_CHECKED.value()
+        try:
+            for _ in range(self.sweeps):
+                # Make every user due again, as if a full interval had passed.
+                async with repo.transaction():
+                    await repo.db.execute("UPDATE tracker_state SET next_poll_at = 0")
+                scheduler.set_partitions(leases.owned)
+                await scheduler.load(repo, leases.owned, spread=0.0)
+                started = time.perf_counter()
+                poll = tracker._poll_due(
+                    notifier, repo, leetcode, leases, scheduler, suggestions
+                )
+                await self._timed(scenario, poll)
+                scenario.elapsed += time.perf_counter() - started
+        finally:
+            await leases.release()
+        scenario.operations = int(tracker.USERS_CHECKED.value() - checked)
+        return scenario
+
+
+def format_report(report: dict[str, Any]) -> str:
+    header = f"{'scenario':<16}{'ops':>8}{'errors':>8}{'ops/s':>10}"
+    header += f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    lines = [
+        f"{report['users']} users, concurrency {report['concurrency']}",
+        "",
+        header,
+    ]
+    for s in report["scenarios"]:
+        lines.append(
+            f"{s['name']:<16}{s['operations']:>8}{s['errors']:>8}{s['throughput']:>10.1f}"
+            f"{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}"
+        )
+    lines.append("")
+    for name, stats in report["services"].items():
+        counts = ", ".join(f"{k}={v}" for k, v in sorted(stats.items()))
+        lines.append(f"{name}: {counts}")
+    return "\n".join(lines)
@@ -0,0 +1,5 @@
+import os
+
+# bot.config requires these at import; nothing here talks to the services.
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
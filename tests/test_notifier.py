@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from bot.services.notifier import Notifier
+
+
+class _FloodedBot:
+    """Rejects the first message with a flood wait, then records sends."""
+
+    def __init__(self, retry_after: int) -> None:
+        self.retry_after = retry_after
+        self.sent: list[tuple[int, float]] = []
+        self._flooded = False
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        if not self._flooded:
+            self._flooded = True
+            raise TelegramRetryAfter(
+                SendMessage(chat_id=chat_id, text=text), "Flood control", self.retry_after
+            )
+        self.sent.append((chat_id, time.monotonic()))
+
+
+async def _retry_after_delays_other_chats() -> None:
+    bot = _FloodedBot(retry_after=1)
+    notifier = Notifier(
+        bot, messages_per_second=100, chat_interval=0.0, coalesce_window=0.0, workers=1
+    )
+    notifier.start()
+    started = time.monotonic()
+    notifier.send(1, "first")
+    await asyncio.sleep(0.05)
+    notifier.send(2, "second")
+    await notifier.close(timeout=5)
+
+    sent = dict(bot.sent)
+    assert set(sent) == {1, 2}
+    # Chat 2 never hit the limit itself, but still waits out the flood wait.
+    assert sent[2] - started >= 0.9
+
+
+def test_retry_after_pauses_other_chats():
+    asyncio.run(_retry_after_delays_other_chats())
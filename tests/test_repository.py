@@ -0,0 +1,62 @@
+import asyncio
+import sqlite3
+
+import aiosqlite
+import pytest
+
+from bot.db.models import init_db
+from bot.db.repository import Repository
+
+
+async def _write_from_other_connection(path: str) -> None:
+    other = await aiosqlite.connect(path)
+    try:
+        await other.execute("PRAGMA busy_timeout = 0")
+        await other.execute("INSERT INTO users (telegram_id) VALUES (999)")
+        await other.commit()
+    finally:
+        await other.close()
+
+
+async def _failed_unit_then_other_writer(path: str, group_commit_window: float) -> None:
+    db = await init_db(path)
+    repo = Repository(db, group_commit_window=group_commit_window)
+    try:
+        with pytest.raises(RuntimeError):
+            async with repo.transaction():
+                await repo.db.execute("INSERT INTO users (telegram_id) VALUES (1)")
+                raise RuntimeError("unit failed")
+        assert not db.in_transaction
+        await _write_from_other_connection(path)
+        assert await repo.get_user(1) is None
+    finally:
+        await repo.flush()
+        await db.close()
+
+
+@pytest.mark.parametrize("group_commit_window", [0.0, 0.05])
+def test_failed_unit_releases_write_lock(tmp_path, group_commit_window):
+    path = str(tmp_path / "bot.db")
+    asyncio.run(_failed_unit_then_other_writer(path, group_commit_window))
+
+
+async def _failed_unit_keeps_pending_group_commit(path: str) -> None:
+    db = await init_db(path)
+    repo = Repository(db, group_commit_window=0.05)
+    try:
+        committed = asyncio.create_task(repo.get_or_create_user(1))
+        await asyncio.sleep(0)
+        with pytest.raises(RuntimeError):
+            async with repo.transaction():
+                await repo.db.execute("INSERT INTO users (telegram_id) VALUES (2)")
+                raise RuntimeError("unit failed")
+        await committed
+        await _write_from_other_connection(path)
+        assert await repo.get_user(1) is not None
+        assert await repo.get_user(2) is None
+    finally:
+        await db.close()
+
+
+def test_failed_unit_keeps_pending_group_commit(tmp_path):
+    asyncio.run(_failed_unit_keeps_pending_group_commit(str(tmp_path / "bot.db")))
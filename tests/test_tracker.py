@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from bot.db.models import init_db
+from bot.db.repository import Repository
+from bot.services import tracker
+from bot.services.scheduler import PollScheduler
+
+
+class _AssignsMidPoll:
+    """LeetCode stand-in: a new task is assigned while the fetch is in flight."""
+
+    def __init__(self, repo: Repository, user_id: int) -> None:
+        self.repo = repo
+        self.user_id = user_id
+
+    async def get_recent_submissions_many(self, usernames, limit):
+        await self.repo.assign_task(self.user_id, "two-sum", "Easy", "Array")
+        return {name: [{"titleSlug": "old", "timestamp": "200"}] for name in usernames}
+
+
+async def _assign_during_check(path: str) -> None:
+    db = await init_db(path)
+    repo = Repository(db)
+    try:
+        user = await repo.get_or_create_user(1)
+        await repo.set_leetcode_username(1, "alice")
+        await repo.assign_task(user["id"], "pending", "Easy", "Array")
+        await repo.save_tracker_states([(user["id"], 100, 300, 0, 1)])
+        (tracked,) = await repo.get_tracked_users([user["id"]])
+
+        scheduler = PollScheduler(1)
+        started = time.time()
+        await tracker._check_batch(
+            None, repo, _AssignsMidPoll(repo, user["id"]), scheduler, None, [tracked]
+        )
+
+        # The reset from the assignment survives: no stale watermark comes back.
+        (after,) = await repo.get_tracked_users([user["id"]])
+        assert after.watermark is None
+        assert after.epoch == tracked.epoch + 1
+        assert scheduler.next_due() <= started + 1
+
+        # A poll that read the current state saves normally.
+        skipped = await repo.save_tracker_states([(user["id"], 200, 300, 0, after.epoch)])
+        assert skipped == set()
+        (saved,) = await repo.get_tracked_users([user["id"]])
+        assert saved.watermark == 200
+    finally:
+        await db.close()
+
+
+def test_assign_during_check_keeps_reset(tmp_path):
+    asyncio.run(_assign_during_check(str(tmp_path / "bot.db")))